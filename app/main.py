@@ -1,20 +1,67 @@
 # app/main.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import asyncio
+import math
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
-from src.summarizer import summarize_text
+from src.summarizer import summarize_text, summarize_long_text, stream_summary
 
-from src.ner import extract_entities
+from src.ner import extract_entities, extract_entities_batch
 
-from src.qa import answer_question
+from src.qa import answer_question, answer_questions
 
-from src.groq_qa import answer_question_groq, summarize_with_groq
-import io
-from PyPDF2 import PdfReader
+from src.analyze import run_analysis
 
-from src.rag import answer_question_rag, summarize_rag
+from src.groq_qa import (
+    answer_question_groq_async,
+    summarize_with_groq_async,
+    close_groq_client,
+    groq_cache_stats,
+    stream_answer_question_groq,
+    stream_summarize_with_groq,
+)
+import json
+
+from src.rag import (
+    answer_question_rag_async,
+    answer_questions_rag_async,
+    summarize_rag_async,
+    embedding_cache_stats,
+    get_embedding_batcher,
+    stream_answer_question_rag,
+    stream_summarize_rag,
+)
+from src.documents import get_document_store
+from src.ann_index import search_similar
+from src.corpus_store import get_corpus_store
+from src.metrics import (
+    register_callback,
+    render_prometheus,
+    server_timing_header,
+    start_request_timings,
+)
+from src.summarizer import get_summarization_batcher
+from src.single_flight import single_flight_stats
+from src.rate_limiter import (
+    PRIORITY_BATCH,
+    RateLimitExceeded,
+    get_groq_rate_limiter,
+    groq_priority,
+    notify_grant,
+)
+from src.config import (
+    ANN_NLIST,
+    NER_MAX_BATCH_SIZE,
+    QA_BATCH_MAX_QUESTIONS,
+    SEARCH_MAX_TOP_K,
+    WARMUP_ON_STARTUP,
+)
+from src.warmup import readiness, start_background_warmup
+from src.pdf_extract import PdfLimitError, spool_upload, iter_pages, extract_pdf_text
 
 
 
@@ -34,9 +81,183 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    """
+    Collect per-stage timings recorded while handling the request and
+    return them in a Server-Timing header.
+    """
+    timings = start_request_timings()
+    response = await call_next(request)
+    if timings:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+
+# ---- Prometheus metrics ----
+# Stage histograms are recorded in src/ (see src/metrics.py); cache,
+# batcher and single-flight counters are read from their stats() at scrape time.
+
+def _cache_counters(stat: str) -> dict:
+    counters = {}
+    for cache_name, stats in (
+        ("embeddings", embedding_cache_stats()),
+        ("groq_responses", groq_cache_stats()),
+    ):
+        counters[(("cache", cache_name),)] = stats[stat]
+    return counters
+
+
+register_callback("cache_memory_hits_total", "counter", "Cache hits served from memory.",
+                  lambda: _cache_counters("memory_hits"))
+register_callback("cache_disk_hits_total", "counter", "Cache hits served from disk.",
+                  lambda: _cache_counters("disk_hits"))
+register_callback("cache_misses_total", "counter", "Cache lookups that missed.",
+                  lambda: _cache_counters("misses"))
+register_callback("cache_hit_rate", "gauge", "Fraction of cache lookups that hit.",
+                  lambda: _cache_counters("hit_rate"))
+register_callback("summarization_batches_total", "counter", "Batched generate calls.",
+                  lambda: {(): get_summarization_batcher().stats()["batches"]})
+register_callback("summarization_batched_requests_total", "counter", "Requests served by batched generate calls.",
+                  lambda: {(): get_summarization_batcher().stats()["items"]})
+register_callback("embedding_batches_total", "counter", "Batched embedding encode calls.",
+                  lambda: {(): get_embedding_batcher().stats()["batches"]})
+register_callback("embedding_batched_texts_total", "counter", "Texts embedded by batched encode calls.",
+                  lambda: {(): get_embedding_batcher().stats()["items"]})
+
+
+def _single_flight_counters(stat: str) -> dict:
+    return {(("call", name),): stats[stat] for name, stats in single_flight_stats().items()}
+
+
+register_callback("single_flight_leaders_total", "counter", "Calls that ran the computation.",
+                  lambda: _single_flight_counters("leaders"))
+register_callback("single_flight_coalesced_total", "counter", "Calls that waited on an identical in-flight call.",
+                  lambda: _single_flight_counters("coalesced"))
+register_callback("single_flight_in_flight", "gauge", "Computations currently running.",
+                  lambda: _single_flight_counters("in_flight"))
+
+
+
+def _rate_limiter_stat(stat: str) -> dict:
+    limiter = get_groq_rate_limiter()
+    return {(): limiter.stats()[stat]} if limiter is not None else {}
+
+
+register_callback("groq_rate_granted_total", "counter", "Groq calls let through by the rate limiter.",
+                  lambda: _rate_limiter_stat("granted"))
+register_callback("groq_rate_rejected_total", "counter", "Groq calls rejected at once (queue full or wait too long).",
+                  lambda: _rate_limiter_stat("rejected"))
+register_callback("groq_rate_timed_out_total", "counter", "Groq calls that gave up waiting in the rate-limit queue.",
+                  lambda: _rate_limiter_stat("timed_out"))
+register_callback("groq_rate_queued", "gauge", "Groq calls waiting for the rate limiter.",
+                  lambda: _rate_limiter_stat("queued"))
+register_callback("groq_rate_tokens_available", "gauge", "Tokens left in the Groq tokens-per-minute bucket.",
+                  lambda: _rate_limiter_stat("tokens_available"))
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    # Groq budget exhausted: tell the client when to come back instead of a 500
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus text exposition of stage timings, input sizes and cache counters.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("startup")
+def start_warmup():
+    # Load models in the background so the first request doesn't pay for it
+    if WARMUP_ON_STARTUP:
+        start_background_warmup()
+
+
+@app.on_event("shutdown")
+async def shutdown_groq_client():
+    # Release pooled keep-alive connections to Groq
+    await close_groq_client()
+
+
+# ---- Document registry ----
+# Upload a document once (POST /documents), then pass its doc_id instead of
+# the full text to /qa, /ner, /qa_rag and /summarize_rag.
+
+class DocumentRequest(BaseModel):
+    text: str
+
+
+class DocumentResponse(BaseModel):
+    doc_id: str
+    num_chunks: int
+    num_chars: int
+
+
+def _get_document(doc_id: str):
+    doc = get_document_store().get(doc_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail=f"Unknown doc_id: {doc_id}")
+    return doc
+
+
+def _resolve_text(text: str | None, doc_id: str | None) -> str:
+    """
+    Use the raw text if given, otherwise the text of a registered document.
+    """
+    if text is not None:
+        return text
+    if doc_id is not None:
+        return _get_document(doc_id).text
+    raise HTTPException(status_code=400, detail="Provide either the text or a doc_id.")
+
+
+def _document_for(text: str | None, doc_id: str | None):
+    """
+    For RAG endpoints: the registered document to search, or None when raw text is given.
+    """
+    if text is not None:
+        return None
+    if doc_id is not None:
+        return _get_document(doc_id)
+    raise HTTPException(status_code=400, detail="Provide either the text or a doc_id.")
+
+
+@app.post("/documents", response_model=DocumentResponse)
+def create_document(payload: DocumentRequest):
+    """
+    Register a document: chunk + embed it once and return its doc_id.
+    """
+    if not payload.text.strip():
+        raise HTTPException(status_code=400, detail="Document text is empty.")
+    doc = get_document_store().add(payload.text)
+    return DocumentResponse(doc_id=doc.doc_id, num_chunks=doc.num_chunks, num_chars=len(doc.text))
+
+
+@app.get("/documents/{doc_id}", response_model=DocumentResponse)
+def get_document(doc_id: str):
+    doc = _get_document(doc_id)
+    return DocumentResponse(doc_id=doc.doc_id, num_chunks=doc.num_chunks, num_chars=len(doc.text))
+
+
+@app.delete("/documents/{doc_id}")
+def delete_document(doc_id: str):
+    if not get_document_store().delete(doc_id):
+        raise HTTPException(status_code=404, detail=f"Unknown doc_id: {doc_id}")
+    return {"deleted": doc_id}
+
+
 class SummarizeRequest(BaseModel):
     text: str
     max_new_tokens: int | None = 256
+    long_document: bool = False       # map-reduce over the whole text instead of truncating
 
 
 class SummarizeResponse(BaseModel):
@@ -45,21 +266,27 @@ class SummarizeResponse(BaseModel):
 class SummarizeGenRequest(BaseModel):
     text: str
     max_new_tokens: int | None = 256
+    use_cache: bool = True            # set False to bypass the response cache
 
 
 class SummarizeGenResponse(BaseModel):
     summary: str
+    cache: dict | None = None         # {"hit": bool, "tier": "memory" | "disk" | None}
 
 
 class SummarizeRagRequest(BaseModel):
-    text: str
+    text: str | None = None
+    doc_id: str | None = None         # registered document (instead of text)
     max_new_tokens: int | None = 256
-    top_k: int | None = 5
+    top_k: int | None = None          # optional cap on retrieved chunks
+    token_budget: int | None = None   # context tokens (default RAG_CONTEXT_TOKEN_BUDGET)
+    use_cache: bool = True
 
 
 class SummarizeRagResponse(BaseModel):
     summary: str
     retrieved_chunks: list[str]
+    cache: dict | None = None
 
 
 @app.get("/health")
@@ -67,47 +294,81 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready_check():
+    """
+    Readiness: 200 once every warm-up model is loaded, 503 before that.
+    Reports per-model state and load / warm-up timings.
+    """
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Hit/miss counters for the RAG chunk-embedding cache
+    and the Groq response cache, plus in-flight coalescing counters.
+    """
+    return {
+        "embeddings": embedding_cache_stats(),
+        "groq_responses": groq_cache_stats(),
+        "documents": get_document_store().stats(),
+        "single_flight": single_flight_stats(),
+    }
+
+
 @app.post("/summarize", response_model=SummarizeResponse)
 def summarize_endpoint(payload: SummarizeRequest):
     """
     Takes a long legal / policy text and returns a summary.
+    With long_document=True the whole text is summarized (map-reduce),
+    otherwise input beyond MAX_INPUT_LENGTH tokens is truncated.
     """
-    summary = summarize_text(
+    summarize_fn = summarize_long_text if payload.long_document else summarize_text
+    summary = summarize_fn(
         text=payload.text,
         max_new_tokens=payload.max_new_tokens or 256,
     )
     return SummarizeResponse(summary=summary)
 
 @app.post("/summarize_groq", response_model=SummarizeGenResponse)
-def summarize_groq_endpoint(payload: SummarizeGenRequest):
+async def summarize_groq_endpoint(payload: SummarizeGenRequest):
     """
     Summarize text using Groq LLM (Llama3).
     """
-    summary = summarize_with_groq(
+    result = await summarize_with_groq_async(
         payload.text,
         max_tokens=payload.max_new_tokens or 256,
+        use_cache=payload.use_cache,
     )
-    return SummarizeGenResponse(summary=summary)
+    return SummarizeGenResponse(summary=result["summary"], cache=result["cache"])
 
 @app.post("/summarize_rag", response_model=SummarizeRagResponse)
-def summarize_rag_endpoint(payload: SummarizeRagRequest):
+async def summarize_rag_endpoint(payload: SummarizeRagRequest):
     """
     RAG-based summarization:
-    - Retrieve top-k chunks via embeddings
+    - Rank chunks via embeddings and pack the best into the token budget
     - Summarize them with Groq
     """
-    result = summarize_rag(
-        full_text=payload.text,
-        top_k=payload.top_k or 5,
+    document = _document_for(payload.text, payload.doc_id)
+    result = await summarize_rag_async(
+        full_text=payload.text or "",
+        top_k=payload.top_k,
+        use_cache=payload.use_cache,
+        document=document,
+        token_budget=payload.token_budget,
     )
     return SummarizeRagResponse(
         summary=result["summary"],
         retrieved_chunks=result["retrieved_chunks"],
+        cache=result.get("cache"),
     )
 
 
 class NerRequest(BaseModel):
-    text: str
+    text: str | None = None
+    doc_id: str | None = None
 
 class NerResponse(BaseModel):
     entities: list
@@ -118,29 +379,54 @@ def ner_endpoint(payload: NerRequest):
     Extract entities (ORG, PERSON, DATE, MONEY, LAW REFERENCES, etc.)
     from legal/policy text.
     """
-    result = extract_entities(payload.text)
+    result = extract_entities(_resolve_text(payload.text, payload.doc_id))
     return NerResponse(entities=result["entities"])
 
+class NerBatchRequest(BaseModel):
+    texts: list[str]
+    # defaults to NER_BATCH_SIZE; worker processes are fixed by NER_N_PROCESS
+    batch_size: int | None = Field(default=None, ge=1, le=NER_MAX_BATCH_SIZE)
+
+@app.post("/ner/batch")
+def ner_batch_endpoint(payload: NerBatchRequest):
+    """
+    Bulk NER over many documents (spaCy nlp.pipe).
+    Streams NDJSON: one {"index": i, "entities": [...]} line per input text.
+    """
+    kwargs = {}
+    if payload.batch_size:
+        kwargs["batch_size"] = payload.batch_size
+
+    def _lines():
+        results = extract_entities_batch(payload.texts, **kwargs)
+        for i, result in enumerate(results):
+            yield json.dumps({"index": i, "entities": result["entities"]}) + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
 class QARequest(BaseModel):
     question: str
-    context: str
+    context: str | None = None
+    doc_id: str | None = None
 
 
 class QAResponse(BaseModel):
     answer: str
     score: float
-    start: int
-    end: int
+    start: int          # character offset into context
+    end: int            # character offset into context
+    n_best: list = []   # alternative spans across all windows
 
 @app.post("/qa", response_model=QAResponse)
 def qa_endpoint(payload: QARequest):
     """
     Answer a question given a legal/policy context.
-    Uses extractive QA (span prediction).
+    Uses extractive QA (span prediction) over sliding windows,
+    so the whole context is searched.
     """
     result = answer_question(
         question=payload.question,
-        context=payload.context,
+        context=_resolve_text(payload.context, payload.doc_id),
     )
 
     return QAResponse(
@@ -148,6 +434,7 @@ def qa_endpoint(payload: QARequest):
         score=result["score"],
         start=result["start"],
         end=result["end"],
+        n_best=result["n_best"],
     )
 
 class QAResult(BaseModel):
@@ -161,12 +448,14 @@ class AnalyzeRequest(BaseModel):
     text: str
     question: str | None = None       # optional question
     max_new_tokens: int | None = 256  # for summary length
+    stages: list[str] | None = None   # subset of ["summary", "entities", "qa"]; default: all that apply
 
 
 class AnalyzeResponse(BaseModel):
-    summary: str
-    entities: list
+    summary: str | None = None        # None if the stage was not requested
+    entities: list | None = None
     qa: QAResult | None = None        # only filled if question is provided
+    timings_ms: dict = {}             # per-stage wall time, plus "total"
 
 @app.post("/analyze", response_model=AnalyzeResponse)
 def analyze_endpoint(payload: AnalyzeRequest):
@@ -175,24 +464,21 @@ def analyze_endpoint(payload: AnalyzeRequest):
     - Summarizes the input text
     - Extracts entities
     - Optionally answers a question about the text
+    The stages run concurrently; callers can pick which ones to run.
     """
-    # 1. Summary
-    summary = summarize_text(
-        text=payload.text,
-        max_new_tokens=payload.max_new_tokens or 256,
-    )
-
-    # 2. NER
-    ner_result = extract_entities(payload.text)
-    entities = ner_result["entities"]
-
-    # 3. Optional QA
-    qa_result = None
-    if payload.question:
-        qa_raw = answer_question(
+    try:
+        result = run_analysis(
+            text=payload.text,
             question=payload.question,
-            context=payload.text,
+            max_new_tokens=payload.max_new_tokens or 256,
+            stages=payload.stages,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    qa_result = None
+    if result["qa"] is not None:
+        qa_raw = result["qa"]
         qa_result = QAResult(
             answer=qa_raw["answer"],
             score=qa_raw["score"],
@@ -201,38 +487,37 @@ def analyze_endpoint(payload: AnalyzeRequest):
         )
 
     return AnalyzeResponse(
-        summary=summary,
-        entities=entities,
+        summary=result["summary"],
+        entities=result["entities"],
         qa=qa_result,
+        timings_ms=result["timings_ms"],
     )
 
 class QAGenRequest(BaseModel):
     question: str
     context: str
     max_new_tokens: int | None = None
+    use_cache: bool = True
 
 
 class QAGenResponse(BaseModel):
     answer: str
+    cache: dict | None = None
 
 @app.post("/qa_gen", response_model=QAGenResponse)
-def qa_gen_endpoint(payload: QAGenRequest):
+async def qa_gen_endpoint(payload: QAGenRequest):
     """
     Generative QA endpoint (Groq Llama3):
     Returns a natural-language answer, not just a span.
     """
-    answer = answer_question_groq(
+    result = await answer_question_groq_async(
         question=payload.question,
         context=payload.context,
+        use_cache=payload.use_cache,
     )
-    return QAGenResponse(answer=answer)
+    return QAGenResponse(answer=result["answer"], cache=result["cache"])
 
-@app.post("/extract_text")
-async def extract_text(file: UploadFile = File(...)):
-    """
-    Extract text from an uploaded PDF and return it as plain text.
-    For now we only support .pdf files.
-    """
+def _check_pdf_filename(file: UploadFile) -> None:
     filename = file.filename or ""
     if not filename.lower().endswith(".pdf"):
         raise HTTPException(
@@ -240,61 +525,386 @@ async def extract_text(file: UploadFile = File(...)):
             detail="Only PDF files are supported for text extraction.",
         )
 
-    try:
-        # Read file content into memory
-        content = await file.read()
-        pdf_bytes = io.BytesIO(content)
-
-        reader = PdfReader(pdf_bytes)
-        extracted_text_parts = []
 
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            extracted_text_parts.append(page_text)
+@app.post("/extract_text")
+async def extract_text(file: UploadFile = File(...)):
+    """
+    Extract text from an uploaded PDF and return it as plain text.
+    For now we only support .pdf files.
+    Also returns each page's character offsets within the text.
+    """
+    _check_pdf_filename(file)
 
-        full_text = "\n\n".join(extracted_text_parts).strip()
+    path = None
+    try:
+        # Spool to disk and extract pages in a process pool (off the event loop)
+        path = await spool_upload(file)
+        result = await extract_pdf_text(path)
 
-        if not full_text:
+        if not result["text"].strip():
             raise HTTPException(
                 status_code=422,
                 detail="No extractable text found in the PDF (might be scanned or image-based).",
             )
 
-        return {"text": full_text}
+        return result
 
     except HTTPException:
         # re-raise our own HTTPException
         raise
+    except PdfLimitError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to extract text from PDF: {e}",
         )
+    finally:
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+
+@app.post("/extract_text/stream")
+async def extract_text_stream(file: UploadFile = File(...)):
+    """
+    Stream PDF text page by page as NDJSON:
+    {"page", "start", "end", "text"} per page, then {"done": true, ...}.
+    Errors after streaming has started are sent as {"error": ...}.
+    """
+    _check_pdf_filename(file)
+    try:
+        path = await spool_upload(file)
+    except PdfLimitError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    async def _lines():
+        num_pages = 0
+        num_chars = 0
+        try:
+            async for page in iter_pages(path):
+                num_pages += 1
+                num_chars = page["end"]
+                yield json.dumps(page) + "\n"
+            yield json.dumps({"done": True, "num_pages": num_pages, "num_chars": num_chars}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            path.unlink(missing_ok=True)
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
 
 class QARagRequest(BaseModel):
   question: str
-  context: str
-  top_k: int | None = 3
+  context: str | None = None
+  doc_id: str | None = None
+  top_k: int | None = None          # optional cap on retrieved chunks
+  token_budget: int | None = None   # context tokens (default RAG_CONTEXT_TOKEN_BUDGET)
+  use_cache: bool = True
 
 
 class QARagResponse(BaseModel):
   answer: str
   retrieved_chunks: list[str]
+  cache: dict | None = None
 
 @app.post("/qa_rag", response_model=QARagResponse)
-def qa_rag_endpoint(payload: QARagRequest):
+async def qa_rag_endpoint(payload: QARagRequest):
     """
     RAG-based QA:
     - Splits the full context into chunks
-    - Retrieves top-k relevant chunks using embeddings
+    - Ranks chunks using embeddings and packs the best into the token budget
     - Asks Groq with only those chunks
     """
-    result = answer_question_rag(
+    document = _document_for(payload.context, payload.doc_id)
+    result = await answer_question_rag_async(
         question=payload.question,
-        full_context=payload.context,
-        top_k=payload.top_k or 3,
+        full_context=payload.context or "",
+        top_k=payload.top_k,
+        use_cache=payload.use_cache,
+        document=document,
+        token_budget=payload.token_budget,
     )
     return QARagResponse(
         answer=result["answer"],
         retrieved_chunks=result["retrieved_chunks"],
+        cache=result.get("cache"),
+    )
+
+
+class QABatchRequest(BaseModel):
+  questions: list[str]
+  context: str | None = None
+  doc_id: str | None = None
+  mode: str = "extractive"          # "extractive" (roberta spans) or "rag" (Groq)
+  top_k: int | None = None          # rag only: optional cap on retrieved chunks
+  token_budget: int | None = None   # rag only: context tokens per question
+  use_cache: bool = True            # rag only
+
+
+class QABatchResponse(BaseModel):
+  results: list[dict]               # one QAResponse / QARagResponse body per question
+
+
+@app.post("/qa/batch", response_model=QABatchResponse)
+async def qa_batch_endpoint(payload: QABatchRequest):
+    """
+    Answer a list of questions about one document.
+    - extractive: all question x window pairs share batched forward passes
+    - rag: the document is chunked and embedded once, the questions are
+      embedded together and the Groq calls are sent concurrently
+    """
+    if len(payload.questions) > QA_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {QA_BATCH_MAX_QUESTIONS} questions per request.",
+        )
+
+    if payload.mode == "extractive":
+        context = _resolve_text(payload.context, payload.doc_id)
+        results = await asyncio.to_thread(answer_questions, payload.questions, context)
+    elif payload.mode == "rag":
+        document = _document_for(payload.context, payload.doc_id)
+        # Checklists yield to single interactive questions at the Groq limiter
+        with groq_priority(PRIORITY_BATCH):
+            results = await answer_questions_rag_async(
+                payload.questions,
+                full_context=payload.context or "",
+                top_k=payload.top_k,
+                use_cache=payload.use_cache,
+                document=document,
+                token_budget=payload.token_budget,
+            )
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {payload.mode}")
+
+    return QABatchResponse(results=results)
+
+
+class SearchRequest(BaseModel):
+    query: str                        # a question or a passage
+    top_k: int = Field(default=10, ge=1, le=SEARCH_MAX_TOP_K)
+    group_by_bill: bool = False       # best section per bill instead of raw chunks
+    nprobe: int | None = Field(default=None, ge=1, le=ANN_NLIST)  # clusters scanned (default ANN_NPROBE)
+
+
+class SearchHit(BaseModel):
+    doc_id: str
+    title: str
+    split: str
+    start: int
+    end: int
+    text: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    results: list[SearchHit]
+
+
+@app.post("/search", response_model=SearchResponse)
+def search_endpoint(payload: SearchRequest):
+    """
+    Find BillSum bills / sections similar to a question or passage
+    (ANN index over the corpus store, exact re-rank).
+    """
+    store = get_corpus_store()
+    store.refresh()  # the store may have been built since this process opened it
+    if store.num_chunks == 0:
+        raise HTTPException(
+            status_code=503,
+            detail="Corpus store is empty; build it with: python -m src.corpus_store",
+        )
+    kwargs = {"nprobe": payload.nprobe} if payload.nprobe else {}
+    results = search_similar(
+        payload.query,
+        top_k=payload.top_k,
+        group_by_bill=payload.group_by_bill,
+        **kwargs,
+    )
+    return SearchResponse(results=[SearchHit(**r) for r in results])
+
+
+# ---- Streaming (Server-Sent Events) ----
+# Each stream sends "token" events with {"text": ...} pieces, then "done".
+# RAG streams send a "chunks" event with the retrieved chunks first.
+# Failures after the stream has started are reported as an "error" event;
+# Groq streams are primed first, so a rate-limit rejection is still a 503.
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_from_sync_tokens(pieces):
+    try:
+        for piece in pieces:
+            yield _sse("token", {"text": piece})
+        yield _sse("done", {})
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+
+
+async def _sse_from_tokens(pieces):
+    try:
+        async for piece in pieces:
+            yield _sse("token", {"text": piece})
+        yield _sse("done", {})
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+
+
+async def _sse_from_events(events):
+    try:
+        async for event, data in events:
+            if event == "chunks":
+                yield _sse("chunks", {"retrieved_chunks": data})
+            else:
+                yield _sse(event, {"text": data})
+        yield _sse("done", {})
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+
+
+async def _primed(items):
+    """
+    Start `items` and wait until the Groq call inside it has been let through
+    by the rate limiter (or `items` has finished), so RateLimitExceeded is
+    raised here, before the response starts. Items produced meanwhile (e.g.
+    the "chunks" event) are sent first; other errors are replayed into the
+    stream.
+    """
+    if get_groq_rate_limiter() is None:
+        return items
+
+    granted = asyncio.Event()
+    pulled, error, finished = [], None, False
+
+    def _next():
+        # The task runs in a copy of this context, so the limiter sees `granted`
+        with notify_grant(granted):
+            return asyncio.ensure_future(items.__anext__())
+
+    pending = _next()
+    while True:
+        waiter = asyncio.ensure_future(granted.wait())
+        await asyncio.wait({pending, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if not pending.done():
+            break
+        try:
+            pulled.append(pending.result())
+        except StopAsyncIteration:
+            finished = True
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            error = e
+        pending = None
+        if finished or error is not None or granted.is_set():
+            break
+        pending = _next()
+
+    async def _replay():
+        next_item = pending
+        try:
+            for item in pulled:
+                yield item
+            if error is not None:
+                raise error
+            if finished:
+                return
+            if next_item is not None:
+                try:
+                    item = await next_item
+                except StopAsyncIteration:
+                    return
+                finally:
+                    next_item = None
+                yield item
+            async for item in items:
+                yield item
+        finally:
+            if next_item is not None:
+                next_item.cancel()
+
+    return _replay()
+
+
+def _event_stream(body) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/summarize/stream")
+def summarize_stream_endpoint(payload: SummarizeRequest):
+    """
+    Stream a T5 summary token by token (greedy decoding).
+    """
+    pieces = stream_summary(
+        text=payload.text,
+        max_new_tokens=payload.max_new_tokens or 256,
+    )
+    return _event_stream(_sse_from_sync_tokens(pieces))
+
+
+@app.post("/summarize_groq/stream")
+async def summarize_groq_stream_endpoint(payload: SummarizeGenRequest):
+    """
+    Stream a Groq summary as it is generated.
+    """
+    pieces = stream_summarize_with_groq(
+        payload.text,
+        max_tokens=payload.max_new_tokens or 256,
+        use_cache=payload.use_cache,
+    )
+    return _event_stream(_sse_from_tokens(await _primed(pieces)))
+
+
+@app.post("/qa_gen/stream")
+async def qa_gen_stream_endpoint(payload: QAGenRequest):
+    """
+    Stream a generative (Groq) answer as it is generated.
+    """
+    pieces = stream_answer_question_groq(
+        question=payload.question,
+        context=payload.context,
+        use_cache=payload.use_cache,
+    )
+    return _event_stream(_sse_from_tokens(await _primed(pieces)))
+
+
+@app.post("/qa_rag/stream")
+async def qa_rag_stream_endpoint(payload: QARagRequest):
+    """
+    Streaming RAG QA: retrieved chunks first, then the answer tokens.
+    """
+    document = _document_for(payload.context, payload.doc_id)
+    events = stream_answer_question_rag(
+        question=payload.question,
+        full_context=payload.context or "",
+        top_k=payload.top_k,
+        use_cache=payload.use_cache,
+        document=document,
+        token_budget=payload.token_budget,
+    )
+    events = await _primed(events)
+    return _event_stream(_sse_from_events(events))
+
+
+@app.post("/summarize_rag/stream")
+async def summarize_rag_stream_endpoint(payload: SummarizeRagRequest):
+    """
+    Streaming RAG summarization: retrieved chunks first, then the summary tokens.
+    """
+    document = _document_for(payload.text, payload.doc_id)
+    events = stream_summarize_rag(
+        full_text=payload.text or "",
+        top_k=payload.top_k,
+        use_cache=payload.use_cache,
+        document=document,
+        token_budget=payload.token_budget,
     )
+    events = await _primed(events)
+    return _event_stream(_sse_from_events(events))
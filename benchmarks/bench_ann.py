@@ -0,0 +1,86 @@
+# benchmarks/bench_ann.py
+#
+# Recall@k vs latency of the ANN index against exact search over the corpus
+# store, for a range of nprobe values, with and without exact re-ranking.
+# Queries are chunk vectors sampled from the store (plus the benchmark
+# questions, embedded, with --questions).
+#
+# Usage: python -m benchmarks.bench_ann [--k 10] [--nprobe 1 4 16 64] [--output ann.json]
+
+import argparse
+import time
+
+import numpy as np
+
+from src.ann_index import get_ann_index, search_corpus
+from src.config import ANN_RERANK
+from src.corpus_store import exact_top_k, get_corpus_store
+
+from .common import percentile, write_results
+from .run import QUESTIONS
+
+
+def _run(search, queries, truth, k) -> dict:
+    samples, recall = [], 0.0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        rows = search(query)
+        samples.append((time.perf_counter() - start) * 1000.0)
+        recall += len(set(rows[:k].tolist()) & set(expected.tolist())) / len(expected)
+    samples.sort()
+    return {
+        f"recall@{k}": round(recall / len(queries), 4),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ANN recall@k vs latency.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="chunk vectors sampled as queries")
+    parser.add_argument("--questions", action="store_true", help="also embed the benchmark questions")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    args = parser.parse_args()
+
+    store, index = get_corpus_store(), get_ann_index()
+    if index is None:
+        raise SystemExit("No ANN index found; build one with: python -m src.ann_index")
+
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(store.num_chunks, min(args.queries, store.num_chunks), replace=False))
+    queries = np.asarray(store.embeddings[rows], dtype=np.float32)
+    if args.questions:
+        from src.rag import load_embedder
+
+        asked = load_embedder().encode(QUESTIONS, convert_to_numpy=True, normalize_embeddings=True)
+        queries = np.concatenate([queries, asked.astype(np.float32)])
+    print(f"{len(queries)} queries over {store.num_chunks} chunks ({index.backend} index)")
+
+    truth, _ = exact_top_k(store.embeddings, queries, args.k)
+    results = {
+        "meta": {
+            "chunks": store.num_chunks,
+            "indexed_rows": index.num_rows,
+            "backend": index.backend,
+            "queries": len(queries),
+            "k": args.k,
+        },
+        "exact": _run(lambda q: store.search(q, args.k)[0], queries, truth, args.k),
+    }
+    for nprobe in args.nprobe:
+        for rerank in (0, ANN_RERANK):
+            name = f"nprobe{nprobe}_rerank{rerank}"
+            print(f"Benchmarking {name} ...")
+            results[name] = _run(
+                lambda q: search_corpus(store, index, q, args.k, nprobe=nprobe, rerank=rerank)[0],
+                queries, truth, args.k,
+            )
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_chunker.py
+#
+# Chunking on data_preview.csv: punkt sentence windows (chunk_text and
+# chunk_spans) vs the legal-structure chunker (legal_chunk_spans).
+# Reports docs/sec plus chunk statistics, including how many chunks
+# cross a SECTION boundary.
+#
+# Usage: python -m benchmarks.bench_chunker [--repeat 5] [--output chunker.json]
+
+import argparse
+import time
+from bisect import bisect_left
+
+from src.legal_chunker import SECTION_RE, legal_chunk_spans, token_spans
+from src.rag import chunk_spans, chunk_text
+
+from .common import load_texts, write_results
+
+
+def _timed(fn, texts, repeat) -> dict:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    docs = len(texts) * repeat
+    return {
+        "docs": docs,
+        "seconds": round(elapsed, 4),
+        "docs_per_sec": round(docs / elapsed, 2) if elapsed else None,
+    }
+
+
+def _span_stats(texts, spans_fn) -> dict:
+    tokens = []
+    crossing = 0
+    for text in texts:
+        starts = [s for s, _ in token_spans(text)]
+        for start, end in spans_fn(text):
+            tokens.append(bisect_left(starts, end) - bisect_left(starts, start))
+            # A section header anywhere after the first character of the chunk
+            if SECTION_RE.search(text, start + 1, end):
+                crossing += 1
+    tokens.sort()
+    return {
+        "chunks": len(tokens),
+        "mean_tokens": round(sum(tokens) / len(tokens), 1) if tokens else 0,
+        "max_tokens": tokens[-1] if tokens else 0,
+        "chunks_crossing_sections": crossing,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark punkt vs legal-structure chunking.")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N docs")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the documents")
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    print(f"Loaded {len(texts)} documents")
+    chunk_text(texts[0])  # make sure punkt is downloaded and loaded before timing
+
+    results = {
+        "punkt_chunk_text": _timed(chunk_text, texts, args.repeat),
+        "punkt_chunk_spans": {
+            **_timed(chunk_spans, texts, args.repeat),
+            **_span_stats(texts, chunk_spans),
+        },
+        "legal_chunk_spans": {
+            **_timed(legal_chunk_spans, texts, args.repeat),
+            **_span_stats(texts, legal_chunk_spans),
+        },
+    }
+    punkt = results["punkt_chunk_spans"]["docs_per_sec"]
+    legal = results["legal_chunk_spans"]["docs_per_sec"]
+    results["legal_speedup_vs_punkt_spans"] = round(legal / punkt, 2) if punkt else None
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_ner.py
+#
+# Docs/sec for NER on data_preview.csv:
+#   - the original per-call path (full spaCy pipeline, one nlp(text) per doc)
+#   - per-call with the NER-only pipeline (extract_entities)
+#   - nlp.pipe with the NER-only pipeline (extract_entities_batch)
+#
+# Usage: python -m benchmarks.bench_ner [--batch-size 64] [--n-process 1 2] [--output ner.json]
+
+import argparse
+import time
+
+import spacy
+
+from src.ner import MODEL_NAME, extract_entities, extract_entities_batch, load_ner_model
+
+from .common import load_texts, write_results
+
+
+def _docs_per_sec(fn, texts) -> dict:
+    start = time.perf_counter()
+    fn(texts)
+    elapsed = time.perf_counter() - start
+    return {
+        "docs": len(texts),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(texts) / elapsed, 2) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call vs batched NER.")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N docs")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    print(f"Loaded {len(texts)} documents")
+
+    full_nlp = spacy.load(MODEL_NAME)
+    load_ner_model()
+    # Warm up both pipelines so model loading is not timed
+    full_nlp(texts[0])
+    extract_entities(texts[0])
+
+    results = {
+        "per_call_full_pipeline": _docs_per_sec(
+            lambda docs: [full_nlp(t) for t in docs], texts
+        ),
+        "per_call_ner_only": _docs_per_sec(
+            lambda docs: [extract_entities(t) for t in docs], texts
+        ),
+    }
+    for n_process in args.n_process:
+        results[f"pipe_batch{args.batch_size}_proc{n_process}"] = _docs_per_sec(
+            lambda docs: list(
+                extract_entities_batch(docs, batch_size=args.batch_size, n_process=n_process)
+            ),
+            texts,
+        )
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
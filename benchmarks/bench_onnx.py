@@ -0,0 +1,86 @@
+# benchmarks/bench_onnx.py
+#
+# Compare the torch and quantized ONNX Runtime backends on bill_sum_preview.csv:
+# QA latency and answer agreement, summarization latency and ROUGE-L against
+# the reference summaries. Each backend runs in its own subprocess because
+# INFERENCE_BACKEND is read when src.config is imported.
+#
+# Usage: python -m benchmarks.bench_onnx --limit 10 --iterations 10 --output onnx.json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from .common import BILL_SUM_PREVIEW_CSV, load_rows, measure, write_results
+from .run import QUESTIONS
+
+BACKENDS = ("torch", "onnx")
+
+
+def run_backend(limit: int, iterations: int) -> dict:
+    """
+    Runs inside the child process for one backend.
+    """
+    from rouge_score import rouge_scorer
+
+    from src.config import INFERENCE_BACKEND
+    from src.qa import answer_question
+    from src.summarizer import summarize_texts
+
+    rows = [r for r in load_rows(BILL_SUM_PREVIEW_CSV, limit) if r.get("text")]
+    texts = [r["text"] for r in rows]
+    qa_inputs = [(QUESTIONS[i % len(QUESTIONS)], t) for i, t in enumerate(texts)]
+
+    print(f"[{INFERENCE_BACKEND}] Benchmarking answer_question ...", file=sys.stderr)
+    qa = measure(answer_question, qa_inputs, iterations)
+    answers = [answer_question(q, c)["answer"] for q, c in qa_inputs]
+
+    print(f"[{INFERENCE_BACKEND}] Benchmarking summarize_texts ...", file=sys.stderr)
+    summarize = measure(lambda t: summarize_texts([t]), [(t,) for t in texts], iterations)
+    summaries = summarize_texts(texts)
+
+    scorer = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)
+    rouge_l = [scorer.score(r["summary"], s)["rougeL"].fmeasure for r, s in zip(rows, summaries)]
+
+    return {
+        "answer_question": qa,
+        "summarize_texts": summarize,
+        "rougeL_f": round(sum(rouge_l) / len(rouge_l), 4) if rouge_l else None,
+        "answers": answers,
+    }
+
+
+def _spawn(backend: str, limit: int, iterations: int) -> dict:
+    env = dict(os.environ, INFERENCE_BACKEND=backend)
+    out = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.bench_onnx", "--backend", backend,
+         "--limit", str(limit), "--iterations", str(iterations)],
+        env=env, text=True,
+    )
+    # Model loaders print progress to stdout; the results are the last line
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark torch vs quantized ONNX backends.")
+    parser.add_argument("--limit", type=int, default=10, help="fixture documents to use")
+    parser.add_argument("--iterations", type=int, default=10, help="warm calls per target")
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.limit, args.iterations)))
+        return
+
+    results = {b: _spawn(b, args.limit, args.iterations) for b in BACKENDS}
+    reference, candidate = results["torch"].pop("answers"), results["onnx"].pop("answers")
+    same = sum(a.strip() == b.strip() for a, b in zip(reference, candidate))
+    results["qa_exact_agreement"] = round(same / len(reference), 4) if reference else None
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/common.py
+
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.config import PROJECT_ROOT
+
+DATA_PREVIEW_CSV = PROJECT_ROOT / "data_preview.csv"
+BILL_SUM_PREVIEW_CSV = PROJECT_ROOT / "bill_sum_preview.csv"
+
+# Bill texts are far longer than the csv module's default field limit
+csv.field_size_limit(sys.maxsize)
+
+
+def load_rows(path: Path = DATA_PREVIEW_CSV, limit: Optional[int] = None) -> List[dict]:
+    """
+    Read a preview CSV (columns: text, summary, title, ...) as a list of dicts.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return rows[:limit] if limit is not None else rows
+
+
+def load_texts(path: Path = DATA_PREVIEW_CSV, limit: Optional[int] = None) -> List[str]:
+    """
+    Bill texts from a preview CSV.
+    """
+    return [row["text"] for row in load_rows(path, limit) if row.get("text")]
+
+
+def write_results(results: dict, output: Optional[str]) -> None:
+    """
+    Print results as JSON, and also write them to `output` if given.
+    """
+    text = json.dumps(results, indent=2)
+    print(text)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+        print(f"Saved: {output}")
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100.0 * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+def measure(fn, inputs: list, iterations: int) -> dict:
+    """
+    Call fn(*inputs[i % len(inputs)]) once cold, then `iterations` times warm.
+    Latencies are in milliseconds; docs_per_sec is based on the warm mean.
+    """
+    start = time.perf_counter()
+    fn(*inputs[0])
+    cold_ms = (time.perf_counter() - start) * 1000.0
+
+    samples = []
+    for i in range(iterations):
+        args = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000.0)
+
+    samples.sort()
+    mean_ms = sum(samples) / len(samples) if samples else 0.0
+    return {
+        "cold_ms": round(cold_ms, 2),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+        "mean_ms": round(mean_ms, 2),
+        "docs_per_sec": round(1000.0 / mean_ms, 2) if mean_ms else None,
+        "iterations": iterations,
+    }
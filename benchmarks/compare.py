@@ -0,0 +1,34 @@
+# benchmarks/compare.py
+#
+# Compare two benchmark result files written by benchmarks.run.
+#
+# Usage: python -m benchmarks.compare before.json after.json [--metric p50_ms]
+
+import argparse
+import json
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--metric", default="p50_ms", help="e.g. p50_ms, p95_ms, cold_ms")
+    args = parser.parse_args()
+
+    before = json.loads(Path(args.before).read_text(encoding="utf-8"))
+    after = json.loads(Path(args.after).read_text(encoding="utf-8"))
+
+    print(f"{'target':<28} {'before':>10} {'after':>10} {'change':>9}")
+    for section in ("functions", "routes"):
+        for name, old in before.get(section, {}).items():
+            new = after.get(section, {}).get(name)
+            if new is None:
+                continue
+            old_value, new_value = old[args.metric], new[args.metric]
+            change = (new_value - old_value) / old_value * 100.0 if old_value else 0.0
+            print(f"{name:<28} {old_value:>10.2f} {new_value:>10.2f} {change:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
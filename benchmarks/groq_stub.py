@@ -0,0 +1,63 @@
+# benchmarks/groq_stub.py
+#
+# Local stand-in for the Groq chat-completions API, so benchmarks measure our
+# own code rather than the network. Supports normal and `stream: true` calls.
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_ANSWER = (
+    "The bill requires the agency to submit an annual report to Congress "
+    "describing the program, its costs, and the number of participants."
+)
+
+
+def _make_handler(latency_s: float):
+    class GroqStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency_s)
+
+            if payload.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for word in STUB_ANSWER.split(" "):
+                    chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+                return
+
+            body = json.dumps({
+                "choices": [{"message": {"role": "assistant", "content": STUB_ANSWER}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return GroqStubHandler
+
+
+def start_groq_stub(latency_ms: float = 0.0, port: int = 0):
+    """
+    Start the stub on 127.0.0.1 in a daemon thread.
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(latency_ms / 1000.0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
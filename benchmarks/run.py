@@ -0,0 +1,224 @@
+# benchmarks/run.py
+#
+# Latency / throughput benchmark for the library functions and every FastAPI
+# route, using data_preview.csv and bill_sum_preview.csv as fixtures.
+# Groq is replaced by a local stub server so results only reflect our code.
+#
+# Usage:
+#   python -m benchmarks.run --iterations 20 --output bench.json
+#   python -m benchmarks.compare before.json after.json
+
+import argparse
+import itertools
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Must happen before src.config is imported (by .common): route timings must
+# not overlap with the background model warm-up, nor include client-side Groq
+# rate-limit waits (the stub has no rate limits)
+os.environ["WARMUP_ON_STARTUP"] = "0"
+os.environ["GROQ_RATE_LIMIT_ENABLED"] = "0"
+
+from .common import BILL_SUM_PREVIEW_CSV, load_texts, measure, write_results
+from .groq_stub import start_groq_stub
+
+QUESTIONS = [
+    "What does this bill require?",
+    "Who is responsible for enforcing this act?",
+    "When does this act take effect?",
+    "How much funding is authorized?",
+]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _isolate_stores(scratch_dir: str) -> None:
+    """
+    Keep measured runs independent of earlier runs: the embedding cache is
+    memory-only and starts empty, and registered documents go to a scratch
+    directory instead of DOCUMENT_STORE_DIR.
+    """
+    from src.documents import get_document_store
+    from src.embedding_cache import get_embedding_cache
+
+    cache = get_embedding_cache()
+    cache.disk_dir = None
+    cache.clear()
+    get_document_store().disk_dir = Path(scratch_dir)
+
+
+def _uncached(fn):
+    """
+    fn with the embedding cache emptied before every call, so each call
+    pays for encoding.
+    """
+    from src.embedding_cache import get_embedding_cache
+
+    def _call(*args):
+        get_embedding_cache().clear()
+        return fn(*args)
+
+    return _call
+
+
+def bench_functions(texts, summary_texts, iterations) -> dict:
+    from src.ner import extract_entities
+    from src.qa import answer_question
+    from src.rag import build_index, chunk_text, retrieve_top_k
+    from src.summarizer import summarize_text
+
+    # Cold paths are timed first, before anything is chunked or embedded
+    results = {}
+    print("Benchmarking chunk_text ...")
+    results["chunk_text"] = measure(chunk_text, [(t,) for t in texts], iterations)
+    chunked = [(chunks,) for chunks in (chunk_text(t) for t in texts) if chunks]
+    print("Benchmarking build_index ...")
+    results["build_index"] = measure(_uncached(build_index), chunked, iterations)
+    print("Benchmarking build_index (cached embeddings) ...")
+    results["build_index_cached"] = measure(build_index, chunked, iterations)
+    indexes = [build_index(chunks) for (chunks,) in chunked]
+    print("Benchmarking retrieve_top_k ...")
+    results["retrieve_top_k"] = measure(
+        lambda q, idx: retrieve_top_k(q, idx[0], idx[1], top_k=3),
+        [(QUESTIONS[i % len(QUESTIONS)], idx) for i, idx in enumerate(indexes)],
+        iterations,
+    )
+    print("Benchmarking extract_entities ...")
+    results["extract_entities"] = measure(extract_entities, [(t,) for t in texts], iterations)
+    print("Benchmarking answer_question ...")
+    results["answer_question"] = measure(
+        answer_question,
+        [(QUESTIONS[i % len(QUESTIONS)], t) for i, t in enumerate(texts)],
+        iterations,
+    )
+    print("Benchmarking summarize_text ...")
+    results["summarize_text"] = measure(summarize_text, [(t,) for t in summary_texts], iterations)
+    return results
+
+
+def _route_cases(texts, summary_texts):
+    """
+    (name, method, path, payloads) for every route we can call without a PDF.
+    Groq-backed routes pass use_cache=False so every call reaches the stub.
+    """
+    q = QUESTIONS
+    return [
+        ("GET /health", "get", "/health", [None]),
+        ("POST /summarize", "post", "/summarize", [{"text": t} for t in summary_texts]),
+        ("POST /summarize_groq", "post", "/summarize_groq",
+         [{"text": t, "use_cache": False} for t in texts]),
+        ("POST /summarize_rag", "post", "/summarize_rag",
+         [{"text": t, "use_cache": False} for t in texts]),
+        ("POST /ner", "post", "/ner", [{"text": t} for t in texts]),
+        ("POST /ner/batch", "post", "/ner/batch", [{"texts": texts[:8]}]),
+        ("POST /qa", "post", "/qa",
+         [{"question": q[i % len(q)], "context": t} for i, t in enumerate(texts)]),
+        ("POST /analyze", "post", "/analyze",
+         [{"text": t, "question": q[i % len(q)]} for i, t in enumerate(texts)]),
+        ("POST /qa_gen", "post", "/qa_gen",
+         [{"question": q[i % len(q)], "context": t, "use_cache": False} for i, t in enumerate(texts)]),
+        ("POST /qa_rag", "post", "/qa_rag",
+         [{"question": q[i % len(q)], "context": t, "use_cache": False} for i, t in enumerate(texts)]),
+        ("POST /qa_rag/stream", "post", "/qa_rag/stream",
+         [{"question": q[i % len(q)], "context": t, "use_cache": False} for i, t in enumerate(texts)]),
+        # Every call registers a new document (see bench_routes)
+        ("POST /documents", "post", "/documents", [{"text": t} for t in texts]),
+    ]
+
+
+def bench_routes(texts, summary_texts, iterations) -> dict:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    # Documents are content-addressed: repeating one is a no-op, so each
+    # POST /documents gets a unique copy and an empty embedding cache
+    copies = itertools.count()
+
+    def _new_document(payload):
+        return {"text": f"{payload['text']}\n\nBenchmark copy {next(copies)}."}
+
+    results = {}
+    with TestClient(app) as client:
+        for name, method, path, payloads in _route_cases(texts, summary_texts):
+            print(f"Benchmarking {name} ...")
+
+            def _call(payload, method=method, path=path):
+                if method == "get":
+                    response = client.get(path)
+                else:
+                    if path == "/documents":
+                        payload = _new_document(payload)
+                    response = client.post(path, json=payload)
+                response.raise_for_status()
+                return response.content
+
+            if path == "/documents":
+                _call = _uncached(_call)
+            results[name] = measure(_call, [(p,) for p in payloads], iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark library functions and API routes.")
+    parser.add_argument("--iterations", type=int, default=20, help="warm calls per target")
+    parser.add_argument("--limit", type=int, default=10, help="fixture documents to rotate through")
+    parser.add_argument("--groq-latency-ms", type=float, default=0.0, help="simulated Groq latency")
+    parser.add_argument("--skip-functions", action="store_true")
+    parser.add_argument("--skip-routes", action="store_true")
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    args = parser.parse_args()
+
+    # Must happen before src.groq_qa is imported: it reads these at import time
+    server, base_url = start_groq_stub(latency_ms=args.groq_latency_ms)
+    os.environ["GROQ_API_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark-stub-key")
+
+    texts = load_texts(limit=args.limit)
+    summary_texts = load_texts(BILL_SUM_PREVIEW_CSV, limit=args.limit)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "iterations": args.iterations,
+            "fixture_docs": len(texts),
+            "groq_stub_latency_ms": args.groq_latency_ms,
+        },
+    }
+
+    scratch_dir = tempfile.mkdtemp(prefix="bench-documents-")
+    _isolate_stores(scratch_dir)
+
+    start = time.perf_counter()
+    try:
+        if not args.skip_functions:
+            results["functions"] = bench_functions(texts, summary_texts, args.iterations)
+        if not args.skip_routes:
+            results["routes"] = bench_routes(texts, summary_texts, args.iterations)
+    finally:
+        server.shutdown()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    results["meta"]["total_seconds"] = round(time.perf_counter() - start, 2)
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
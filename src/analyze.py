@@ -0,0 +1,99 @@
+# src/analyze.py
+
+from __future__ import annotations
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from .config import ANALYZE_MAX_WORKERS
+from .ner import extract_entities
+from .qa import answer_question
+from .summarizer import summarize_text
+
+# Summary (T5), NER (spaCy) and QA (roberta) use independent models, so the
+# combined analysis runs them side by side instead of one after another.
+
+ANALYZE_STAGES = ("summary", "entities", "qa")
+
+
+@lru_cache(maxsize=1)
+def _get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=ANALYZE_MAX_WORKERS,
+        thread_name_prefix="analyze",
+    )
+
+
+def _timed(fn, *args, **kwargs):
+    """
+    Run one stage on a worker thread and measure it.
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def default_stages(question: Optional[str]) -> list:
+    stages = ["summary", "entities"]
+    if question:
+        stages.append("qa")
+    return stages
+
+
+def run_analysis(
+    text: str,
+    question: Optional[str] = None,
+    max_new_tokens: int = 256,
+    stages: Optional[Iterable[str]] = None,
+) -> dict:
+    """
+    Run the selected stages concurrently.
+
+    Returns:
+        {
+            "summary": str | None,
+            "entities": list | None,
+            "qa": dict | None,
+            "timings_ms": {"summary": float, ..., "total": float}
+        }
+    """
+    stages = list(stages) if stages is not None else default_stages(question)
+    unknown = [s for s in stages if s not in ANALYZE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown analyze stage(s): {unknown}. Choose from {list(ANALYZE_STAGES)}.")
+    if "qa" in stages and not question:
+        raise ValueError("The 'qa' stage needs a question.")
+
+    executor = _get_executor()
+    start = time.perf_counter()
+
+    # Each stage runs in a copy of the caller's context so its metrics land
+    # in the caller's Server-Timing entries
+    def _submit(*args):
+        return executor.submit(contextvars.copy_context().run, _timed, *args)
+
+    futures = {}
+    if "summary" in stages:
+        # Through the shared batcher, so concurrent /analyze and /summarize
+        # calls still batch and coalesce
+        futures["summary"] = _submit(summarize_text, text, max_new_tokens)
+    if "entities" in stages:
+        futures["entities"] = _submit(extract_entities, text)
+    if "qa" in stages:
+        futures["qa"] = _submit(answer_question, question, text)
+
+    results = {"summary": None, "entities": None, "qa": None}
+    timings = {}
+    for stage, future in futures.items():
+        value, elapsed_ms = future.result()
+        timings[stage] = elapsed_ms
+        if stage == "entities":
+            value = value["entities"]
+        results[stage] = value
+
+    timings["total"] = (time.perf_counter() - start) * 1000.0
+    results["timings_ms"] = timings
+    return results
@@ -0,0 +1,426 @@
+# src/ann_index.py
+#
+# Approximate nearest-neighbor search over the corpus embedding store.
+#
+# Usage:
+#   python -m src.ann_index                     # build with ANN_BACKEND
+#   python -m src.ann_index --backend numpy --nlist 512
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    ANN_BACKEND,
+    ANN_INDEX_DIR,
+    ANN_NLIST,
+    ANN_NPROBE,
+    ANN_PQ_M,
+    ANN_RERANK,
+    ANN_TRAIN_SAMPLE,
+)
+from .corpus_store import CorpusStore, exact_top_k, get_corpus_store
+from .metrics import timed
+
+# Brute-force `embeddings @ q` is linear in the corpus size. An IVF-PQ index
+# scans only the clusters closest to the query, scores their vectors from
+# one-byte PQ codes, and re-scores the best candidates exactly.
+
+META_FILE = "meta.json"
+ASSIGN_BLOCK_ROWS = 16384
+
+
+def _faiss_available() -> bool:
+    try:
+        import faiss  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _resolve_backend(backend: str) -> str:
+    if backend == "auto":
+        return "faiss" if _faiss_available() else "numpy"
+    if backend == "faiss" and not _faiss_available():
+        raise RuntimeError("ANN backend 'faiss' needs FAISS: pip install faiss-cpu")
+    return backend
+
+
+def _pq_subspaces(dim: int, m: int) -> int:
+    """
+    Largest number of PQ subspaces <= m that divides dim.
+    """
+    m = max(1, min(m, dim))
+    while dim % m:
+        m -= 1
+    return m
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Nearest centroid (L2) of every row of x, computed in blocks.
+    """
+    half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(x[start : start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        out[start : start + len(block)] = np.argmax(block @ centroids.T - half_norms, axis=1)
+    return out
+
+
+def _kmeans(x: np.ndarray, k: int, n_iter: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Plain Lloyd k-means. Empty clusters are re-seeded from random points.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].astype(np.float32)
+    for _ in range(n_iter):
+        assign = _assign(x, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        centroids[nonempty] = np.add.reduceat(x[order], starts, axis=0) / counts[nonempty, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+    return centroids
+
+
+def _training_sample(matrix: np.ndarray, size: int, seed: int = 0) -> np.ndarray:
+    n = matrix.shape[0]
+    if n <= size:
+        return np.asarray(matrix, dtype=np.float32)
+    rows = np.sort(np.random.default_rng(seed).choice(n, size, replace=False))
+    return np.asarray(matrix[rows], dtype=np.float32)
+
+
+class IvfPqIndex:
+    """
+    Pure-NumPy IVF-PQ index for inner-product search.
+
+    - Coarse quantizer: `nlist` k-means centroids. Each vector is stored in
+      the inverted list of its nearest centroid.
+    - Residual PQ: vector - centroid is split into `m` subvectors, each
+      encoded as the id (one byte) of its nearest of 256 sub-centroids.
+    - Search: q.x ~= q.c + sum_j LUT[j, code_j], where the lookup table
+      LUT[j, c] = q_j . subcentroid_j[c] is computed once per query.
+
+    Arrays are saved as .npy files and loaded memory-mapped, so processes
+    share them like the corpus vectors.
+    """
+
+    backend = "numpy"
+    ARRAYS = ("centroids", "codebooks", "list_offsets", "list_rows", "codes")
+
+    def __init__(self, centroids, codebooks, list_offsets, list_rows, codes, num_rows: int):
+        self.centroids = centroids          # (nlist, dim) float32
+        self.codebooks = codebooks          # (m, 256, dsub) float32
+        self.list_offsets = list_offsets    # (nlist + 1,) int64
+        self.list_rows = list_rows          # (num_rows,) int64, grouped by list
+        self.codes = codes                  # (num_rows, m) uint8, same order
+        self.num_rows = num_rows
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, nlist: int, m: int, train_sample: int) -> "IvfPqIndex":
+        n, dim = matrix.shape
+        m = _pq_subspaces(dim, m)
+        dsub = dim // m
+        sample = _training_sample(matrix, train_sample)
+
+        print(f"Training coarse quantizer: {nlist} lists on {len(sample)} vectors")
+        centroids = _kmeans(sample, nlist)
+        nlist = len(centroids)
+
+        print(f"Training PQ: {m} subspaces x 256 codes")
+        residuals = sample - centroids[_assign(sample, centroids)]
+        codebooks = np.stack([
+            _kmeans(residuals[:, j * dsub : (j + 1) * dsub], 256, n_iter=15, seed=j)
+            for j in range(m)
+        ])
+        if codebooks.shape[1] < 256:  # tiny corpora: pad so codes index safely
+            pad = np.zeros((m, 256 - codebooks.shape[1], dsub), dtype=np.float32)
+            codebooks = np.concatenate([codebooks, pad], axis=1)
+
+        print(f"Encoding {n} vectors")
+        assign = np.empty(n, dtype=np.int64)
+        codes = np.empty((n, m), dtype=np.uint8)
+        for start in range(0, n, ASSIGN_BLOCK_ROWS):
+            block = np.asarray(matrix[start : start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            block_assign = _assign(block, centroids)
+            residual = block - centroids[block_assign]
+            assign[start : start + len(block)] = block_assign
+            for j in range(m):
+                codes[start : start + len(block), j] = _assign(
+                    residual[:, j * dsub : (j + 1) * dsub], codebooks[j]
+                )
+
+        list_rows = np.argsort(assign, kind="stable")
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+        return cls(centroids, codebooks, list_offsets, list_rows, codes[list_rows], n)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k (rows, scores) for one query vector.
+        """
+        m, _, dsub = self.codebooks.shape
+        coarse = self.centroids @ query
+        nprobe = min(nprobe, len(coarse))
+        probe = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+
+        # LUT[j, c] = q_j . codebooks[j, c]
+        lut = np.einsum("jd,jcd->jc", query.reshape(m, dsub), self.codebooks)
+
+        starts, ends = self.list_offsets[probe], self.list_offsets[probe + 1]
+        if not (ends - starts).sum():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        positions = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        base = np.repeat(coarse[probe], ends - starts)
+        codes = np.asarray(self.codes[positions])
+        scores = base + lut[np.arange(m), codes].sum(axis=1)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return np.asarray(self.list_rows[positions[top]]), scores[top]
+
+    def save(self, path: Path) -> None:
+        for name in self.ARRAYS:
+            np.save(path / f"{name}.npy", getattr(self, name))
+
+    @classmethod
+    def load(cls, path: Path, num_rows: int) -> "IvfPqIndex":
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in cls.ARRAYS}
+        arrays["centroids"] = np.asarray(arrays["centroids"])  # small, used by every query
+        arrays["codebooks"] = np.asarray(arrays["codebooks"])
+        return cls(num_rows=num_rows, **arrays)
+
+
+class FaissIndex:
+    """
+    The same IVF-PQ layout built with FAISS (IndexIVFPQ, inner product).
+    """
+
+    backend = "faiss"
+    INDEX_FILE = "faiss.index"
+
+    def __init__(self, index, num_rows: int):
+        self.index = index
+        self.num_rows = num_rows
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, nlist: int, m: int, train_sample: int) -> "FaissIndex":
+        import faiss
+
+        n, dim = matrix.shape
+        sample = _training_sample(matrix, train_sample)
+        nlist = min(nlist, len(sample))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subspaces(dim, m), 8, faiss.METRIC_INNER_PRODUCT)
+        print(f"Training FAISS IVF{nlist},PQ on {len(sample)} vectors")
+        index.train(sample)
+        for start in range(0, n, ASSIGN_BLOCK_ROWS):
+            index.add(np.asarray(matrix[start : start + ASSIGN_BLOCK_ROWS], dtype=np.float32))
+        return cls(index, n)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        self.index.nprobe = nprobe
+        scores, rows = self.index.search(query.reshape(1, -1).astype(np.float32), k)
+        keep = rows[0] >= 0
+        return rows[0][keep].astype(np.int64), scores[0][keep]
+
+    def save(self, path: Path) -> None:
+        import faiss
+
+        faiss.write_index(self.index, str(path / self.INDEX_FILE))
+
+    @classmethod
+    def load(cls, path: Path, num_rows: int) -> "FaissIndex":
+        import faiss
+
+        return cls(faiss.read_index(str(path / cls.INDEX_FILE)), num_rows)
+
+
+BACKENDS = {"numpy": IvfPqIndex, "faiss": FaissIndex}
+
+
+def build_ann_index(
+    store: CorpusStore,
+    path: Path = ANN_INDEX_DIR,
+    backend: str = ANN_BACKEND,
+    nlist: int = ANN_NLIST,
+    m: int = ANN_PQ_M,
+    train_sample: int = ANN_TRAIN_SAMPLE,
+):
+    """
+    Build an index over every vector currently in the store and save it.
+    """
+    if store.num_chunks == 0:
+        raise RuntimeError("Corpus store is empty; build it first with: python -m src.corpus_store")
+
+    backend = _resolve_backend(backend)
+    # FAISS and k-means want ~40 training points per list
+    nlist = max(1, min(nlist, store.num_chunks // 39))
+    start = time.perf_counter()
+    index = BACKENDS[backend].build(store.embeddings, nlist, m, train_sample)
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    index.save(path)
+    meta = {
+        "backend": backend,
+        "num_rows": index.num_rows,
+        "nlist": nlist,
+        "pq_m": _pq_subspaces(store.dim, m),
+        "dim": store.dim,
+        "model": store.meta.get("model"),
+        "build_seconds": round(time.perf_counter() - start, 2),
+    }
+    # Written last and atomically: a running API reloads when it changes
+    tmp_path = path / f"{META_FILE}.tmp"
+    tmp_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    tmp_path.replace(path / META_FILE)
+    return index
+
+
+def load_ann_index(path: Path = ANN_INDEX_DIR):
+    """
+    Load a saved index, or None if none has been built.
+    """
+    path = Path(path)
+    meta_path = path / META_FILE
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    return BACKENDS[_resolve_backend(meta["backend"])].load(path, meta["num_rows"])
+
+
+_index_lock = threading.Lock()
+_index_cache = {"mtime": None, "index": None}
+
+
+def get_ann_index():
+    """
+    Process-wide ANN index (None until one is built). meta.json is written
+    last by build_ann_index, so when its mtime changes the index was rebuilt
+    and is loaded again.
+    """
+    meta_path = Path(ANN_INDEX_DIR) / META_FILE
+    try:
+        mtime = meta_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _index_lock:
+        if mtime != _index_cache["mtime"]:
+            _index_cache["index"] = load_ann_index(ANN_INDEX_DIR) if mtime is not None else None
+            _index_cache["mtime"] = mtime
+        return _index_cache["index"]
+
+
+def search_corpus(
+    store: CorpusStore,
+    index,
+    query: np.ndarray,
+    top_k: int = 10,
+    nprobe: int = ANN_NPROBE,
+    rerank: int = ANN_RERANK,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k (rows, scores) over the whole store for one normalized query vector.
+
+    The index proposes max(top_k, rerank) candidates, which are re-scored
+    exactly against the float16 vectors. Rows appended to the store after
+    the index was built are scanned exactly and merged in. With no index,
+    this is an exact search.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if index is None:
+        return store.search(query, top_k)
+
+    rows, _ = index.search(query, max(top_k, rerank), nprobe)
+    rows = np.sort(rows)  # sorted reads from the memmap
+    scores = np.asarray(store.embeddings[rows], dtype=np.float32) @ query
+
+    if store.num_chunks > index.num_rows:
+        tail = store.embeddings[index.num_rows :]
+        tail_rows, tail_scores = exact_top_k(tail, query, top_k)
+        rows = np.concatenate([rows, tail_rows[0] + index.num_rows])
+        scores = np.concatenate([scores, tail_scores[0]])
+
+    k = min(top_k, len(scores))
+    if k == 0:
+        return rows[:0], scores[:0]
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return rows[top], scores[top]
+
+
+def search_similar(
+    text: str,
+    top_k: int = 10,
+    group_by_bill: bool = False,
+    nprobe: int = ANN_NPROBE,
+) -> list:
+    """
+    Bills / sections similar to a question or passage.
+    Returns chunk dicts (doc_id, title, split, start, end, text, score), best
+    first; with group_by_bill only the best chunk of each bill is kept.
+    """
+    from .rag import embed_texts
+
+    if top_k < 1:
+        return []
+    nprobe = max(1, nprobe)
+
+    store = get_corpus_store()
+    store.refresh()  # pick up rows appended by a build since the last query
+    with timed("search_query_embed_seconds"):
+        query = embed_texts([text])[0]
+
+    # Over-fetch when grouping, since several top chunks may share a bill
+    fetch = top_k * 5 if group_by_bill else top_k
+    with timed("search_seconds"):
+        rows, scores = search_corpus(store, get_ann_index(), query, fetch, nprobe=nprobe)
+
+    results, seen = [], set()
+    for chunk, score in zip(store.chunks(rows), scores.tolist()):
+        if group_by_bill:
+            if chunk["doc_id"] in seen:
+                continue
+            seen.add(chunk["doc_id"])
+        chunk["score"] = score
+        results.append(chunk)
+        if len(results) == top_k:
+            break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the ANN index over the corpus store.")
+    parser.add_argument("--backend", choices=["auto", "numpy", "faiss"], default=ANN_BACKEND)
+    parser.add_argument("--nlist", type=int, default=ANN_NLIST)
+    parser.add_argument("--pq-m", type=int, default=ANN_PQ_M)
+    parser.add_argument("--train-sample", type=int, default=ANN_TRAIN_SAMPLE)
+    parser.add_argument("--output", default=str(ANN_INDEX_DIR), help="index directory")
+    args = parser.parse_args()
+
+    build_ann_index(
+        get_corpus_store(),
+        Path(args.output),
+        backend=args.backend,
+        nlist=args.nlist,
+        m=args.pq_m,
+        train_sample=args.train_sample,
+    )
+    print((Path(args.output) / META_FILE).read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# src/batch_pipeline.py
+#
+# Offline bulk processing of BillSum:
+#   stream records -> clean_text -> chunk -> embed -> NER -> (optional) summarize
+# across a process pool, writing sharded Parquet files plus a checkpoint so an
+# interrupted run resumes at the first unfinished shard.
+#
+# Usage:
+#   python -m src.batch_pipeline --split train --workers 2 --summarize
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    BATCH_OUTPUT_DIR,
+    BATCH_SHARD_SIZE,
+    BATCH_WORKERS,
+    SUMMARIZATION_BATCH_SIZE,
+)
+from .preprocess import clean_text, iter_billsum
+
+STAGES = ("clean", "chunk", "embed", "ner", "summarize")
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+# ---- worker side ----
+
+def _process_shard(
+    shard_id: int,
+    first_index: int,
+    records: List[dict],
+    summarize: bool,
+    summary_max_new_tokens: int,
+) -> Tuple[int, dict, dict]:
+    """
+    Run every stage over one shard. Models are loaded once per worker process
+    (the loaders are lru_cached) and each stage runs batched over the shard.
+    Returns (shard_id, columns, stage_seconds).
+    """
+    # Imported here so the parent process never loads the models
+    from .ner import extract_entities_batch
+    from .rag import chunk_spans, load_embedder
+    from .summarizer import summarize_texts
+
+    seconds = {stage: 0.0 for stage in STAGES}
+
+    start = time.perf_counter()
+    texts = [clean_text(r["text"]) for r in records]
+    seconds["clean"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    spans = [chunk_spans(text) for text in texts]
+    seconds["chunk"] = time.perf_counter() - start
+
+    # One encode call for all chunks of the shard. The rows stay one float32
+    # matrix; _write_shard splits them per doc by the chunk counts
+    start = time.perf_counter()
+    all_chunks = [text[s:e] for text, doc_spans in zip(texts, spans) for s, e in doc_spans]
+    embedder = load_embedder()
+    if all_chunks:
+        embeddings = embedder.encode(all_chunks, convert_to_numpy=True, normalize_embeddings=True)
+    else:
+        embeddings = np.zeros((0, embedder.get_sentence_embedding_dimension()))
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    seconds["embed"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    entities = [json.dumps(r["entities"]) for r in extract_entities_batch(texts)]
+    seconds["ner"] = time.perf_counter() - start
+
+    generated = [None] * len(texts)
+    if summarize:
+        start = time.perf_counter()
+        generated = []
+        for i in range(0, len(texts), SUMMARIZATION_BATCH_SIZE):
+            generated.extend(
+                summarize_texts(texts[i : i + SUMMARIZATION_BATCH_SIZE], max_new_tokens=summary_max_new_tokens)
+            )
+        seconds["summarize"] = time.perf_counter() - start
+
+    columns = {
+        "index": list(range(first_index, first_index + len(records))),
+        "title": [r.get("title", "") for r in records],
+        "text": texts,
+        "summary": [r.get("summary", "") for r in records],
+        "chunk_starts": [[s for s, _ in doc_spans] for doc_spans in spans],
+        "chunk_ends": [[e for _, e in doc_spans] for doc_spans in spans],
+        "chunk_embeddings": embeddings,
+        "entities_json": entities,
+        "generated_summary": generated,
+    }
+    return shard_id, columns, seconds
+
+
+# ---- parent side ----
+
+def _iter_shards(records: Iterator[dict], shard_size: int) -> Iterator[Tuple[int, List[dict]]]:
+    shard_id = 0
+    while True:
+        shard = list(islice(records, shard_size))
+        if not shard:
+            return
+        yield shard_id, shard
+        shard_id += 1
+
+
+def _load_checkpoint(output_dir: Path) -> dict:
+    path = output_dir / CHECKPOINT_FILE
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+
+def _save_checkpoint(output_dir: Path, checkpoint: dict) -> None:
+    path = output_dir / CHECKPOINT_FILE
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(checkpoint, indent=2), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _embedding_column(embeddings: np.ndarray, chunk_counts: List[int]):
+    """
+    list<fixed_size_list<float32, dim>>: each document's chunk vectors, stored
+    as float32 (not the list<double> nested Python lists would become).
+    """
+    import pyarrow as pa
+
+    dim = embeddings.shape[1]
+    vectors = pa.FixedSizeListArray.from_arrays(pa.array(embeddings.reshape(-1), type=pa.float32()), dim)
+    offsets = np.concatenate([[0], np.cumsum(chunk_counts, dtype=np.int64)]).astype(np.int32)
+    return pa.ListArray.from_arrays(pa.array(offsets), vectors)
+
+
+def _write_shard(output_dir: Path, shard_id: int, columns: dict) -> Path:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = dict(columns)
+    columns["chunk_embeddings"] = _embedding_column(
+        columns["chunk_embeddings"], [len(starts) for starts in columns["chunk_starts"]]
+    )
+    path = output_dir / f"shard-{shard_id:05d}.parquet"
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(pa.table(columns), tmp_path)
+    tmp_path.replace(path)
+    return path
+
+
+def throughput(checkpoint: dict) -> dict:
+    """
+    Docs/sec per stage (per worker) from the accumulated stage timings.
+    """
+    docs = checkpoint.get("docs", 0)
+    return {
+        stage: round(docs / secs, 2) if secs else None
+        for stage, secs in checkpoint.get("stage_seconds", {}).items()
+    }
+
+
+def run_pipeline(
+    split: str,
+    output_dir: Path = BATCH_OUTPUT_DIR,
+    shard_size: int = BATCH_SHARD_SIZE,
+    workers: int = BATCH_WORKERS,
+    summarize: bool = False,
+    summary_max_new_tokens: int = 128,
+    limit: Optional[int] = None,
+) -> dict:
+    """
+    Process a BillSum split into sharded Parquet files under output_dir.
+    Re-running with the same arguments skips shards that are already written.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    checkpoint = _load_checkpoint(output_dir)
+    settings = {"split": split, "shard_size": shard_size, "summarize": summarize}
+    if checkpoint and checkpoint.get("settings") != settings:
+        raise RuntimeError(
+            f"{output_dir} holds a run with settings {checkpoint.get('settings')}; "
+            f"use another --output directory for {settings}."
+        )
+    if not checkpoint:
+        checkpoint = {
+            "settings": settings,
+            "completed_shards": [],
+            "docs": 0,
+            "stage_seconds": {stage: 0.0 for stage in STAGES},
+        }
+    completed = set(checkpoint["completed_shards"])
+    if completed:
+        print(f"Resuming: {len(completed)} shard(s) already done")
+
+    records = iter_billsum(split)
+    if limit is not None:
+        records = islice(records, limit)
+
+    run_start = time.perf_counter()
+    run_docs = 0
+
+    def _finish(future):
+        nonlocal run_docs
+        shard_id, columns, seconds = future.result()
+        path = _write_shard(output_dir, shard_id, columns)
+        num_docs = len(columns["index"])
+
+        checkpoint["completed_shards"].append(shard_id)
+        checkpoint["docs"] += num_docs
+        for stage, secs in seconds.items():
+            checkpoint["stage_seconds"][stage] += secs
+        _save_checkpoint(output_dir, checkpoint)
+
+        run_docs += num_docs
+        elapsed = time.perf_counter() - run_start
+        print(
+            f"Wrote {path.name} ({num_docs} docs) | "
+            f"total {checkpoint['docs']} docs | {run_docs / elapsed:.2f} docs/sec this run"
+        )
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        pending = set()
+        for shard_id, shard in _iter_shards(records, shard_size):
+            if shard_id in completed:
+                continue
+            # Keep at most two shards per worker in flight to bound memory
+            while len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _finish(future)
+            pending.add(
+                pool.submit(
+                    _process_shard,
+                    shard_id,
+                    shard_id * shard_size,
+                    shard,
+                    summarize,
+                    summary_max_new_tokens,
+                )
+            )
+        for future in wait(pending).done:
+            _finish(future)
+
+    stats = {
+        "docs": checkpoint["docs"],
+        "shards": len(checkpoint["completed_shards"]),
+        "docs_per_sec_per_stage": throughput(checkpoint),
+        "wall_docs_per_sec_this_run": round(run_docs / (time.perf_counter() - run_start), 2),
+    }
+    print(json.dumps(stats, indent=2))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-process BillSum into sharded Parquet.")
+    parser.add_argument("--split", default="train", help="BillSum split: train, test or ca_test")
+    parser.add_argument("--output", default=str(BATCH_OUTPUT_DIR), help="output directory")
+    parser.add_argument("--shard-size", type=int, default=BATCH_SHARD_SIZE)
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--summarize", action="store_true", help="also run T5 summarization")
+    parser.add_argument("--summary-max-new-tokens", type=int, default=128)
+    parser.add_argument("--limit", type=int, default=None, help="only process the first N records")
+    args = parser.parse_args()
+
+    run_pipeline(
+        split=args.split,
+        output_dir=Path(args.output),
+        shard_size=args.shard_size,
+        workers=args.workers,
+        summarize=args.summarize,
+        summary_max_new_tokens=args.summary_max_new_tokens,
+        limit=args.limit,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# src/batcher.py
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+# Dynamic micro-batching: requests that arrive within a short window are
+# grouped and sent through the model together, then results are handed back
+# to each waiting caller.
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads and processes them in batches.
+
+    A batch is flushed when it reaches `max_batch_size` items or when
+    `max_wait_ms` has passed since its first item arrived, whichever is first.
+    `process_batch` receives a list of items and must return a list of
+    results in the same order.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "batcher",
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker, name=self.name, daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue one item. The returned Future resolves to its result.
+        """
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """
+        Submit one item and block until its result is ready.
+        """
+        return self.submit(item).result()
+
+    def _collect_batch(self) -> list:
+        # Block until the first item arrives, then wait up to max_wait for more
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            try:
+                results = self.process_batch(items)
+            except Exception as e:  # hand the error to every waiting caller
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
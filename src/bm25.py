@@ -0,0 +1,129 @@
+# src/bm25.py
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .config import BM25_B, BM25_K1
+
+# Sparse lexical index over the chunks of one document. Dense embeddings miss
+# exact terms such as section numbers, defined terms and dollar amounts; BM25
+# catches them.
+
+# Dollar amounts / numbers ("$1,500,000", "75220", "501") or words
+TERM_RE = re.compile(r"\$?\d+(?:[,.]\d+)*|[a-z]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were which with shall may any such".split()
+)
+
+# Queries that hinge on exact terms: a section reference, a dollar amount,
+# a subdivision path like (a)(1), or a quoted term
+KEYWORD_QUERY_RE = re.compile(
+    r"\$\s?\d"
+    r"|§"
+    r"|\bsec(?:tion|\.)?\s*\d"
+    r"|\(\w{1,4}\)\s*\(\w{1,4}\)"
+    r"|\"[^\"]+\"|“[^”]+”|``[^`']+''",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms without stopwords; thousands separators are dropped
+    from numbers so "$1,000" and "$1000" match.
+    """
+    terms = []
+    for term in TERM_RE.findall(text.lower()):
+        if term in STOPWORDS:
+            continue
+        if term[-1].isdigit():
+            term = term.replace(",", "")
+        terms.append(term)
+    return terms
+
+
+def is_keyword_query(query: str) -> bool:
+    return KEYWORD_QUERY_RE.search(query) is not None
+
+
+class BM25Index:
+    """
+    Okapi BM25 over one document's chunks.
+
+    `weights` is a CSR matrix (num_chunks x vocab) holding the precomputed
+    BM25 weight of every term in every chunk, so scoring a query is a
+    single sparse matrix-vector product.
+    """
+
+    def __init__(self, vocab: Dict[str, int], weights: csr_matrix):
+        self.vocab = vocab
+        self.weights = weights
+
+    @property
+    def num_chunks(self) -> int:
+        return self.weights.shape[0]
+
+    @classmethod
+    def build(cls, chunk_texts: List[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        vocab: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, text in enumerate(chunk_texts):
+            for term in tokenize(text):
+                cols.append(vocab.setdefault(term, len(vocab)))
+                rows.append(i)
+
+        n_chunks = len(chunk_texts)
+        # Duplicate (row, col) pairs are summed: data becomes term frequencies
+        tf = csr_matrix(
+            (np.ones(len(cols), dtype=np.float32), (rows, cols)),
+            shape=(n_chunks, len(vocab)),
+        )
+        tf.sum_duplicates()
+
+        chunk_len = np.asarray(tf.sum(axis=1), dtype=np.float32).ravel()
+        avg_len = float(chunk_len.mean()) if n_chunks and chunk_len.mean() > 0 else 1.0
+        df = np.bincount(tf.indices, minlength=len(vocab))
+        idf = np.log1p((n_chunks - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        row_of = np.repeat(np.arange(n_chunks), np.diff(tf.indptr))
+        norm = k1 * (1.0 - b + b * chunk_len[row_of] / avg_len)
+        tf.data = idf[tf.indices] * tf.data * (k1 + 1.0) / (tf.data + norm)
+        return cls(vocab, tf)
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        BM25 score of every chunk for `query`, shape (num_chunks,).
+        """
+        term_ids = [self.vocab[t] for t in tokenize(query) if t in self.vocab]
+        if not term_ids:
+            return np.zeros(self.num_chunks, dtype=np.float32)
+        q = np.bincount(term_ids, minlength=len(self.vocab)).astype(np.float32)
+        return self.weights @ q
+
+    def to_arrays(self) -> dict:
+        """
+        Plain arrays for np.savez (no pickling needed).
+        """
+        terms = sorted(self.vocab, key=self.vocab.get)
+        return {
+            "bm25_terms": np.array(terms, dtype=str),
+            "bm25_data": self.weights.data,
+            "bm25_indices": self.weights.indices,
+            "bm25_indptr": self.weights.indptr,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, num_chunks: int) -> "BM25Index":
+        terms = arrays["bm25_terms"].tolist()
+        weights = csr_matrix(
+            (arrays["bm25_data"], arrays["bm25_indices"], arrays["bm25_indptr"]),
+            shape=(num_chunks, len(terms)),
+        )
+        return cls({term: i for i, term in enumerate(terms)}, weights)
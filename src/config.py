@@ -1,4 +1,5 @@
 # src/config.py
+import os
 from pathlib import Path
 
 # Root of the project (one level above this file)
@@ -25,6 +26,27 @@ SUMMARIZATION_MODEL_NAME = "t5-small"
 MAX_INPUT_LENGTH = 1024   # tokens for bill text
 MAX_TARGET_LENGTH = 256   # tokens for summary
 
+# Concurrent summarize requests are grouped into one batched generate call:
+# up to SUMMARIZATION_BATCH_SIZE requests that arrive within
+# SUMMARIZATION_BATCH_WAIT_MS of the first one
+SUMMARIZATION_BATCH_SIZE = 8
+SUMMARIZATION_BATCH_WAIT_MS = 20
+
+# Long-document (map-reduce) summarization: each segment's partial summary is
+# capped at this many tokens, and reduce rounds stop after this many levels
+SUMMARIZATION_SEGMENT_MAX_NEW_TOKENS = 128
+SUMMARIZATION_MAX_REDUCE_LEVELS = 4
+
+
+# ---- Inference backend ----
+
+# "torch" (default) or "onnx": dynamically int8-quantized ONNX Runtime models
+# on CPU for QA and summarization (needs the optional `optimum[onnxruntime]`)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+
+# Exported / quantized ONNX models are cached here
+ONNX_MODELS_DIR = MODELS_DIR / "onnx"
+
 
 # ---- QA settings ----
 
@@ -34,5 +56,201 @@ QA_MODEL_NAME = "deepset/roberta-base-squad2"
 # Max tokens for QA context (model limit is usually 512)
 QA_MAX_CONTEXT_LENGTH = 512
 
+# Long contexts are split into overlapping windows of QA_MAX_CONTEXT_LENGTH
+# tokens; consecutive windows share QA_DOC_STRIDE tokens
+QA_DOC_STRIDE = 128
+
+# Number of windows per forward pass
+QA_BATCH_SIZE = 16
+
+# Longest answer span (in tokens) we consider, and how many candidates to keep
+QA_MAX_ANSWER_LENGTH = 30
+QA_N_BEST = 5
+
+# Most questions accepted by one POST /qa/batch request
+QA_BATCH_MAX_QUESTIONS = 64
+
+
+# ---- NER settings ----
+
+# Bulk NER (nlp.pipe): documents per batch and worker processes
+NER_BATCH_SIZE = 64
+NER_N_PROCESS = 1
+
+# Largest batch_size a /ner/batch client may ask for (n_process is server-only)
+NER_MAX_BATCH_SIZE = 512
+
+
+# ---- Embedding / RAG settings ----
+
+# Sentence-transformer used to embed chunks and questions for retrieval
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Chunk and query texts from concurrent requests are embedded together: up to
+# EMBEDDING_BATCH_SIZE texts that arrive within EMBEDDING_BATCH_WAIT_MS of the
+# first one, sorted by length so each encode batch pads to similar lengths
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_BATCH_WAIT_MS = 5
+
+# How documents are chunked for retrieval: "legal" splits on SECTION / (a) / (1)
+# structure and paragraphs (src/legal_chunker.py); "punkt" uses sentence windows
+RAG_CHUNKER = os.getenv("RAG_CHUNKER", "legal")
+
+# Cap per "legal" chunk, in word pieces of the embedder's tokenizer (MiniLM
+# truncates its input at 256, including [CLS] and [SEP])
+CHUNK_MAX_TOKENS = 200
+
+# In-memory budget for cached chunk embeddings (MiniLM vectors are 384 floats,
+# so 64 MB holds roughly 40k chunks)
+EMBEDDING_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Optional on-disk tier for chunk embeddings (set to None to keep memory only)
+EMBEDDING_CACHE_DIR = MODELS_DIR / "embedding_cache"
+
+# Budget for the on-disk tier; least recently used files are deleted beyond it
+EMBEDDING_CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+# Chunk ranking: "hybrid" fuses BM25 with dense cosine similarity,
+# "dense" uses the embedder only
+RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+
+# Weight of the dense score in the fused score (BM25 gets the rest)
+RAG_DENSE_WEIGHT = 0.6
+
+# Rank by BM25 alone, without embedding the query, when the query is clearly
+# keyword-driven (section numbers, dollar amounts, quoted terms)
+RAG_LEXICAL_FAST_PATH = True
+
+# Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+# ---- Groq prompt budget ----
+
+# Tokenizer used to count Groq prompt tokens (Llama 3.1 vocabulary)
+GROQ_TOKENIZER_NAME = "Xenova/Meta-Llama-3.1-Tokenizer"
+
+# Hard cap on context tokens sent to Groq by the direct QA / summary calls
+GROQ_MAX_CONTEXT_TOKENS = 5000
+
+# RAG prompts are filled with the best-scoring chunks until this many
+# context tokens are used (overlapping sentences are only counted once)
+RAG_CONTEXT_TOKEN_BUDGET = 1024
+
+
+# ---- In-flight request coalescing ----
+
+# Identical summarize / NER / RAG / Groq calls that overlap in time share one
+# computation instead of each running the model (see src/single_flight.py)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1") != "0"
+
+
+# ---- Groq rate limits ----
+
+# Client-side request and token budgets for the Groq API (defaults: the
+# free-tier limits of llama-3.1-8b-instant). The token limit is raised or
+# lowered from Groq's x-ratelimit-* response headers.
+GROQ_RATE_LIMIT_ENABLED = os.getenv("GROQ_RATE_LIMIT_ENABLED", "1") != "0"
+GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", "30"))
+GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "6000"))
+
+# Calls wait in a priority queue for their turn. When GROQ_RATE_MAX_QUEUE
+# calls are already waiting, or the estimated wait is longer than
+# GROQ_RATE_MAX_WAIT_SECONDS, the call fails at once (HTTP 503 + Retry-After)
+GROQ_RATE_MAX_QUEUE = int(os.getenv("GROQ_RATE_MAX_QUEUE", "64"))
+GROQ_RATE_MAX_WAIT_SECONDS = float(os.getenv("GROQ_RATE_MAX_WAIT_SECONDS", "10"))
+
+
+# ---- Groq response cache ----
+
+# Identical prompts (same model, temperature and max_tokens) reuse the
+# previous completion until it expires
+GROQ_CACHE_MAX_ENTRIES = 2048
+GROQ_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# SQLite file for the persistent tier (set to None to keep memory only)
+GROQ_CACHE_PATH = DATA_DIR / "groq_cache.sqlite3"
+
+
+# ---- Document registry ----
+
+# Documents uploaded via POST /documents are chunked and embedded once.
+# Up to DOCUMENT_STORE_MAX_DOCS stay in memory and up to
+# DOCUMENT_STORE_DISK_MAX_DOCS on disk, oldest deleted first
+# (set DOCUMENT_STORE_DIR to None for memory only).
+DOCUMENT_STORE_MAX_DOCS = 256
+DOCUMENT_STORE_DISK_MAX_DOCS = 4096
+DOCUMENT_STORE_DIR = DATA_DIR / "documents"
+
+
+# ---- /analyze pipeline ----
+
+# Summary, NER and QA stages run concurrently on this many worker threads
+ANALYZE_MAX_WORKERS = 3
+
+
+# ---- PDF text extraction ----
+
+# Uploads are spooled to a temp file and pages are extracted in a process pool
+PDF_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+PDF_MAX_PAGES = 1000
+PDF_EXTRACT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+PDF_PAGES_PER_TASK = 8
+
+
+# ---- Offline BillSum batch pipeline ----
+
+# Output of `python -m src.batch_pipeline`: sharded Parquet + checkpoint
+BATCH_OUTPUT_DIR = DATA_DIR / "billsum_processed"
+BATCH_SHARD_SIZE = 256
+BATCH_WORKERS = 2
+
+
+# ---- Corpus embedding store ----
+
+# Chunk embeddings for all of BillSum, built with `python -m src.corpus_store`:
+# a float16 matrix in a memory-mapped file plus a SQLite metadata table.
+# Worker processes map the same file read-only and share it via the page cache.
+CORPUS_STORE_DIR = DATA_DIR / "corpus"
+CORPUS_SPLITS = ("train", "test", "ca_test")
+
+# Documents embedded and appended per build step (each step is committed,
+# so an interrupted build resumes where it stopped)
+CORPUS_BUILD_BATCH_DOCS = 64
+
+# Rows scored at a time by exact search, to bound temporary float32 memory
+CORPUS_SEARCH_BLOCK_ROWS = 65536
+
+
+# ---- Approximate nearest-neighbor index (POST /search) ----
+
+# "auto" uses FAISS when it is installed, otherwise the NumPy IVF-PQ engine
+ANN_BACKEND = os.getenv("ANN_BACKEND", "auto")
+ANN_INDEX_DIR = CORPUS_STORE_DIR / "ann"
+
+# IVF: vectors are grouped into ANN_NLIST clusters and a query scans the
+# ANN_NPROBE closest ones. PQ: each vector is compressed to ANN_PQ_M one-byte
+# codes (ANN_PQ_M must divide the embedding dimension)
+ANN_NLIST = 1024
+ANN_NPROBE = 16
+ANN_PQ_M = 48
+
+# Vectors sampled to train the clusters and PQ codebooks
+ANN_TRAIN_SAMPLE = 65536
+
+# The best ANN_RERANK candidates by compressed score are re-scored exactly
+# against the float16 vectors before the final top-k
+ANN_RERANK = 100
+
+# Largest top_k a /search request may ask for
+SEARCH_MAX_TOP_K = 100
+
 
+# ---- Startup warm-up ----
 
+# Load these models (and run one dummy inference each) in a background
+# thread when the API starts; /ready reports their state.
+# Choose from "summarizer", "qa", "embedder", "ner", "prompt_tokenizer".
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
+WARMUP_MODELS = ("summarizer", "qa", "embedder", "ner", "prompt_tokenizer")
@@ -0,0 +1,196 @@
+# src/context_packer.py
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import GROQ_TOKENIZER_NAME
+from .metrics import observe, timed
+
+# Groq prompts are budgeted in real tokens: count them with the Llama tokenizer,
+# count sentences shared by overlapping chunks only once, and fill the budget
+# with the best-scoring chunks first.
+
+# Only used if the tokenizer cannot be loaded. This is deliberately
+# pessimistic: legal text averages about 4 characters per Llama token.
+FALLBACK_CHARS_PER_TOKEN = 3
+
+# Packed pieces are joined with "\n\n", which is one token
+SEPARATOR = "\n\n"
+SEPARATOR_TOKENS = 1
+
+
+@lru_cache(maxsize=1)
+def load_prompt_tokenizer():
+    """
+    Load the tokenizer used to count Groq prompt tokens once and cache it.
+    Returns None if it cannot be loaded; token counts are then estimated
+    from character length.
+    """
+    try:
+        from transformers import AutoTokenizer
+
+        print(f"Loading prompt tokenizer: {GROQ_TOKENIZER_NAME}")
+        with timed("model_load_seconds", {"model": "prompt_tokenizer"}):
+            return AutoTokenizer.from_pretrained(GROQ_TOKENIZER_NAME)
+    except Exception as e:
+        print(f"Prompt tokenizer unavailable ({e}); estimating {FALLBACK_CHARS_PER_TOKEN} chars per token")
+        return None
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapse the indentation and line breaks of bill text. Runs of spaces
+    cost tokens but carry no meaning for the LLM.
+    """
+    return " ".join(text.split())
+
+
+def count_tokens(texts: Sequence[str]) -> List[int]:
+    """
+    Prompt tokens for each text, using a single tokenizer call.
+    """
+    if not texts:
+        return []
+    tokenizer = load_prompt_tokenizer()
+    if tokenizer is None:
+        return [-(-len(t) // FALLBACK_CHARS_PER_TOKEN) for t in texts]
+
+    with timed("prompt_tokenize_seconds"):
+        input_ids = tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+    return [len(ids) for ids in input_ids]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut `text` after its first `max_tokens` tokens, at a token boundary.
+    """
+    if len(text) <= max_tokens:  # every token covers at least one character
+        return text
+    tokenizer = load_prompt_tokenizer()
+    if tokenizer is None:
+        return text[: max_tokens * FALLBACK_CHARS_PER_TOKEN]
+
+    # Tokenize a generous prefix first so huge inputs are not tokenized whole
+    for head in (text[: max_tokens * 32], text):
+        with timed("prompt_tokenize_seconds"):
+            offsets = tokenizer(
+                head, add_special_tokens=False, return_offsets_mapping=True
+            )["offset_mapping"]
+        if len(offsets) > max_tokens:
+            return text[: offsets[max_tokens - 1][1]]
+        if len(head) == len(text):
+            break
+    return text
+
+
+def _segments(spans: Sequence[Tuple[int, int]]) -> Tuple[List[int], List[Tuple[int, int]]]:
+    """
+    Cut the text at every chunk boundary. Returns the sorted boundaries and,
+    for each chunk, the [first, last) range of the segments it spans.
+    """
+    bounds = sorted({pos for span in spans for pos in span})
+    index = {pos: j for j, pos in enumerate(bounds)}
+    return bounds, [(index[start], index[end]) for start, end in spans]
+
+
+def _uncovered_cost(covered: np.ndarray, costs: np.ndarray, first: int, last: int) -> Tuple[int, int]:
+    """
+    (tokens, pieces) of the segments in [first, last) that are not covered
+    yet. Consecutive uncovered segments form one piece; empty pieces are
+    not counted.
+    """
+    tokens = pieces = run = 0
+    for j in range(first, last + 1):
+        if j < last and not covered[j]:
+            run += int(costs[j])
+            continue
+        if run:
+            tokens += run
+            pieces += 1
+            run = 0
+    return tokens, pieces
+
+
+def pack_spans(
+    text: str,
+    spans: Sequence[Tuple[int, int]],
+    scores: np.ndarray,
+    token_budget: int,
+    max_chunks: Optional[int] = None,
+) -> Tuple[List[int], str]:
+    """
+    Pick chunks by retrieval score until `token_budget` context tokens are used.
+
+    `spans` are (start, end) character offsets of the chunks in `text`.
+    Chunks overlap (chunk_text repeats sentences), so a chunk only costs
+    the tokens of the text no better-scoring chunk already covers. A chunk
+    that does not fit is skipped, and smaller lower-scoring chunks can still
+    fill the rest of the budget.
+
+    The text is cut at every chunk boundary and all segments are counted in
+    one tokenizer call; a chunk's cost is the sum of its uncovered segments.
+
+    Returns (chosen chunk indices, best first; packed context). The context
+    is in document order, with overlapping chunks merged so that no sentence
+    appears twice.
+    """
+    chosen: List[int] = []
+    used = 0
+
+    with timed("rag_pack_seconds"):
+        order = np.argsort(-np.asarray(scores), kind="stable")
+        bounds, ranges = _segments(spans)
+        costs = np.asarray(
+            count_tokens([normalize_whitespace(text[s:e]) for s, e in zip(bounds, bounds[1:])]),
+            dtype=np.int64,
+        )
+        covered = np.zeros(len(costs), dtype=bool)
+        # No chunk can add less than its cheapest segment plus a separator
+        min_cost = int(costs[costs > 0].min()) + SEPARATOR_TOKENS if (costs > 0).any() else 0
+
+        for i in order.tolist():
+            if max_chunks is not None and len(chosen) >= max_chunks:
+                break
+            if token_budget - used < max(min_cost, SEPARATOR_TOKENS + 1):
+                break
+
+            first, last = ranges[i]
+            tokens, pieces = _uncovered_cost(covered, costs, first, last)
+            if not pieces:  # everything in it is already in the context
+                continue
+
+            cost = tokens + SEPARATOR_TOKENS * pieces
+            if used + cost > token_budget:
+                continue
+
+            used += cost
+            chosen.append(i)
+            covered[first:last] = True
+
+        if not chosen and len(order):
+            # Even the best chunk alone is over budget: send as much of it as fits
+            best = int(order[0])
+            start, end = spans[best]
+            chosen = [best]
+            context = truncate_to_tokens(normalize_whitespace(text[start:end]), token_budget)
+            observe("rag_context_tokens", token_budget)
+            return chosen, context
+
+    # Runs of covered segments, in document order
+    runs, run_start = [], None
+    for j, is_covered in enumerate(covered.tolist() + [False]):
+        if is_covered and run_start is None:
+            run_start = j
+        elif not is_covered and run_start is not None:
+            runs.append((bounds[run_start], bounds[j]))
+            run_start = None
+
+    context = SEPARATOR.join(
+        piece for piece in (normalize_whitespace(text[s:e]) for s, e in runs) if piece
+    )
+    observe("rag_context_tokens", used)
+    return chosen, context
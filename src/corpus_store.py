@@ -0,0 +1,379 @@
+# src/corpus_store.py
+#
+# On-disk embedding store for the whole BillSum corpus.
+#
+# Usage:
+#   python -m src.corpus_store --splits train test ca_test
+#   python -m src.corpus_store --splits ca_test --limit 500   # small build
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import (
+    CORPUS_BUILD_BATCH_DOCS,
+    CORPUS_SEARCH_BLOCK_ROWS,
+    CORPUS_SPLITS,
+    CORPUS_STORE_DIR,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MODEL_NAME,
+)
+
+EMBEDDINGS_FILE = "embeddings.f16"
+DB_FILE = "corpus.sqlite3"
+META_FILE = "meta.json"
+
+
+def exact_top_k(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    block_rows: int = CORPUS_SEARCH_BLOCK_ROWS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Brute-force inner-product search of `queries` (nq, dim) against the rows
+    of `matrix` (which may be a float16 memmap), scanning `block_rows` rows
+    at a time. Returns (rows, scores), each (nq, k), best first.
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    nq, n = queries.shape[0], matrix.shape[0]
+    k = min(top_k, n)
+    top_scores = np.empty((nq, 0), dtype=np.float32)
+    top_rows = np.empty((nq, 0), dtype=np.int64)
+
+    for start in range(0, n, block_rows):
+        end = min(n, start + block_rows)
+        block_scores = queries @ np.asarray(matrix[start:end], dtype=np.float32).T
+        scores = np.concatenate([top_scores, block_scores], axis=1)
+        rows = np.concatenate(
+            [top_rows, np.broadcast_to(np.arange(start, end), (nq, end - start))], axis=1
+        )
+        if scores.shape[1] > k:
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, part, axis=1)
+            rows = np.take_along_axis(rows, part, axis=1)
+        top_scores, top_rows = scores, rows
+
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top_rows, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class CorpusStore:
+    """
+    Corpus-scale chunk embeddings.
+
+    - embeddings.f16: one contiguous float16 matrix (num_chunks x dim). New
+      chunks are appended to the end of the file; readers open it with
+      np.memmap in read-only mode, so the vectors are shared by all worker
+      processes through the OS page cache instead of each worker's heap.
+    - corpus.sqlite3: metadata. docs(doc_id, split, source_index, title, text)
+      and chunks(row, doc_id, start, end), where chunk `row` is embedding row
+      `row` and start/end are character offsets into the document text.
+    - meta.json: embedding model and dimension.
+
+    Builds are append-only and incremental: documents already in the store
+    are skipped. There is one writer (the build CLI) at a time; any number
+    of readers.
+    """
+
+    def __init__(self, root: Path = CORPUS_STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.embeddings_path = self.root / EMBEDDINGS_FILE
+        self.meta_path = self.root / META_FILE
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / DB_FILE), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "doc_id TEXT PRIMARY KEY, split TEXT NOT NULL, source_index INTEGER NOT NULL, "
+            "title TEXT NOT NULL, text TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "row INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_doc ON chunks (doc_id)")
+        self._db.commit()
+
+        self.meta = {}
+        self._meta_mtime = None
+        self._matrix = None
+        self._rows = 0
+        self.refresh()
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.meta.get("dim")
+
+    @property
+    def num_chunks(self) -> int:
+        return self._rows
+
+    def _committed_rows(self) -> int:
+        row = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()
+        return int(row[0])
+
+    def _meta_changed(self) -> bool:
+        """
+        Re-read meta.json if it was created or rewritten since it was last read.
+        """
+        try:
+            mtime = self.meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._meta_mtime:
+            return False
+        self.meta = json.loads(self.meta_path.read_text(encoding="utf-8")) if mtime is not None else {}
+        self._meta_mtime = mtime
+        return True
+
+    def refresh(self) -> None:
+        """
+        Pick up rows appended since the store was opened (e.g. by a running
+        build), and the dimension if the store was opened before the first build.
+        """
+        with self._lock:
+            meta_changed = self._meta_changed()
+            rows = self._committed_rows()
+            if rows == self._rows and self._matrix is not None and not meta_changed:
+                return
+            self._rows = rows
+            if rows == 0 or self.dim is None:
+                self._matrix = np.zeros((0, self.dim or 0), dtype=np.float16)
+            else:
+                self._matrix = np.memmap(
+                    self.embeddings_path, dtype=np.float16, mode="r", shape=(rows, self.dim)
+                )
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """
+        Read-only (num_chunks x dim) float16 view of the whole corpus.
+        """
+        return self._matrix
+
+    def known_doc_ids(self, doc_ids: Iterable[str]) -> set:
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return set()
+        placeholders = ",".join("?" * len(doc_ids))
+        with self._lock:
+            found = self._db.execute(
+                f"SELECT doc_id FROM docs WHERE doc_id IN ({placeholders})", doc_ids
+            ).fetchall()
+        return {doc_id for (doc_id,) in found}
+
+    def _check_dim(self, dim: int) -> None:
+        if self.dim is None:
+            self.meta = {"model": EMBEDDING_MODEL_NAME, "dim": int(dim)}
+            # Atomic: readers re-read meta.json when it changes (see refresh)
+            tmp_path = self.meta_path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(self.meta, indent=2), encoding="utf-8")
+            tmp_path.replace(self.meta_path)
+        elif self.meta.get("model") != EMBEDDING_MODEL_NAME or dim != self.dim:
+            raise RuntimeError(
+                f"{self.root} holds {self.meta.get('model')} vectors (dim {self.dim}); "
+                f"cannot append {EMBEDDING_MODEL_NAME} vectors of dim {dim}."
+            )
+
+    def append(self, docs: List[dict], spans: List[List[Tuple[int, int]]], embeddings: np.ndarray) -> None:
+        """
+        Append documents with their chunk offsets and one embedding row per chunk
+        (rows in the same order as the flattened spans).
+
+        Vectors are written and fsynced before the metadata transaction commits,
+        so rows only become visible once both are on disk. Bytes left behind by
+        an append that crashed before committing are truncated on the next one.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float16)
+        if embeddings.shape[0] != sum(len(s) for s in spans):
+            raise RuntimeError("append: need exactly one embedding row per chunk")
+        if not docs:
+            return
+
+        with self._lock:
+            first_row = self._committed_rows()
+            if embeddings.shape[0]:
+                self._check_dim(embeddings.shape[1])
+                row_bytes = self.dim * np.dtype(np.float16).itemsize
+                with open(self.embeddings_path, "ab") as f:
+                    f.truncate(first_row * row_bytes)
+                    f.write(np.ascontiguousarray(embeddings).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            chunk_rows = []
+            row = first_row
+            for doc, doc_spans in zip(docs, spans):
+                for start, end in doc_spans:
+                    chunk_rows.append((row, doc["doc_id"], int(start), int(end)))
+                    row += 1
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO docs (doc_id, split, source_index, title, text) VALUES (?, ?, ?, ?, ?)",
+                    [(d["doc_id"], d["split"], d["source_index"], d["title"], d["text"]) for d in docs],
+                )
+                self._db.executemany(
+                    "INSERT INTO chunks (row, doc_id, start, end) VALUES (?, ?, ?, ?)", chunk_rows
+                )
+        self.refresh()
+
+    def search(self, query: np.ndarray, top_k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact inner-product search over every chunk. Returns (rows, scores)
+        for one query vector, best first.
+        """
+        rows, scores = exact_top_k(self.embeddings, query, top_k)
+        return rows[0], scores[0]
+
+    def chunks(self, rows: Sequence[int]) -> List[dict]:
+        """
+        Metadata and text of the given chunk rows, in the order given.
+        """
+        rows = [int(r) for r in rows]
+        if not rows:
+            return []
+        placeholders = ",".join("?" * len(rows))
+        with self._lock:
+            found = self._db.execute(
+                "SELECT c.row, c.doc_id, d.split, d.source_index, d.title, c.start, c.end, "
+                "substr(d.text, c.start + 1, c.end - c.start) "
+                f"FROM chunks c JOIN docs d ON d.doc_id = c.doc_id WHERE c.row IN ({placeholders})",
+                rows,
+            ).fetchall()
+        by_row = {
+            r[0]: {
+                "row": r[0],
+                "doc_id": r[1],
+                "split": r[2],
+                "source_index": r[3],
+                "title": r[4],
+                "start": r[5],
+                "end": r[6],
+                "text": r[7],
+            }
+            for r in found
+        }
+        return [by_row[r] for r in rows if r in by_row]
+
+    def stats(self) -> dict:
+        with self._lock:
+            num_docs = self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        return {
+            "documents": num_docs,
+            "chunks": self.num_chunks,
+            "dim": self.dim,
+            "model": self.meta.get("model"),
+            "embeddings_bytes": self.num_chunks * (self.dim or 0) * 2,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_corpus_store() -> CorpusStore:
+    """
+    Process-wide read handle on the corpus store, opened once.
+    """
+    return CorpusStore(CORPUS_STORE_DIR)
+
+
+# ---- build ----
+
+def _embed(texts: List[str]) -> np.ndarray:
+    from .rag import load_embedder
+
+    return load_embedder().encode(
+        texts,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+
+
+def build_corpus(
+    splits: Sequence[str] = CORPUS_SPLITS,
+    root: Path = CORPUS_STORE_DIR,
+    limit: Optional[int] = None,
+    batch_docs: int = CORPUS_BUILD_BATCH_DOCS,
+) -> dict:
+    """
+    Chunk + embed BillSum splits into the store. Documents are identified as
+    "<split>-<index>", so re-running skips everything already stored and
+    only appends what is new.
+    """
+    from .preprocess import iter_billsum
+    from .rag import document_spans
+
+    store = CorpusStore(root)
+    added_docs = added_chunks = 0
+    start_time = time.perf_counter()
+
+    for split in splits:
+        records = enumerate(iter_billsum(split))
+        if limit is not None:
+            records = islice(records, limit)
+
+        while True:
+            batch = list(islice(records, batch_docs))
+            if not batch:
+                break
+            docs = [
+                {
+                    "doc_id": f"{split}-{index}",
+                    "split": split,
+                    "source_index": index,
+                    "title": record.get("title") or "",
+                    "text": record["text"],
+                }
+                for index, record in batch
+            ]
+            known = store.known_doc_ids(d["doc_id"] for d in docs)
+            docs = [d for d in docs if d["doc_id"] not in known]
+            if not docs:
+                continue
+
+            # The legal chunker needs the original line structure, so raw text is used
+            spans = [document_spans(d["text"]) for d in docs]
+            texts = [d["text"][s:e] for d, doc_spans in zip(docs, spans) for s, e in doc_spans]
+            embeddings = _embed(texts) if texts else np.zeros((0, store.dim or 0), dtype=np.float32)
+            store.append(docs, spans, embeddings)
+
+            added_docs += len(docs)
+            added_chunks += len(texts)
+            print(f"[{split}] +{len(docs)} docs, +{len(texts)} chunks (total {store.num_chunks} chunks)")
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "added_docs": added_docs,
+        "added_chunks": added_chunks,
+        "seconds": round(elapsed, 2),
+        "docs_per_sec": round(added_docs / elapsed, 2) if elapsed else None,
+        **store.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build / extend the BillSum corpus embedding store.")
+    parser.add_argument("--splits", nargs="+", default=list(CORPUS_SPLITS))
+    parser.add_argument("--output", default=str(CORPUS_STORE_DIR), help="store directory")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N docs per split")
+    parser.add_argument("--batch-docs", type=int, default=CORPUS_BUILD_BATCH_DOCS)
+    args = parser.parse_args()
+
+    result = build_corpus(args.splits, Path(args.output), limit=args.limit, batch_docs=args.batch_docs)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# src/documents.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .config import DOCUMENT_STORE_DIR, DOCUMENT_STORE_DISK_MAX_DOCS, DOCUMENT_STORE_MAX_DOCS
+from .bm25 import BM25Index
+from .rag import build_sparse_index, document_spans, embed_chunks
+
+# Upload once, query many times: a document is chunked and embedded when it is
+# registered, and later requests refer to it by doc_id.
+
+
+@dataclass
+class Document:
+    """
+    A registered document: the original text, chunk boundaries as
+    (start, end) character offsets, one embedding row per chunk and a
+    BM25 index over the chunks.
+    """
+
+    doc_id: str
+    text: str
+    spans: np.ndarray       # int32, shape (num_chunks, 2)
+    embeddings: np.ndarray  # float32, shape (num_chunks, dim)
+    bm25: Optional[BM25Index] = field(default=None, repr=False, compare=False)
+
+    @property
+    def num_chunks(self) -> int:
+        return int(self.spans.shape[0])
+
+    def chunk_texts(self) -> List[str]:
+        return [self.text[start:end] for start, end in self.spans.tolist()]
+
+
+# Ids are the first 24 hex digits of a SHA-256 (see document_id)
+DOC_ID_RE = re.compile(r"[0-9a-f]{24}")
+
+
+def document_id(text: str) -> str:
+    """
+    Content-addressed id, so uploading the same text twice is free.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+
+def is_document_id(doc_id: str) -> bool:
+    """
+    True if `doc_id` has the format document_id produces. Ids come from
+    request bodies and become file names, so anything else is rejected
+    before the filesystem is touched.
+    """
+    return isinstance(doc_id, str) and DOC_ID_RE.fullmatch(doc_id) is not None
+
+
+class DocumentStore:
+    """
+    Registry of embedded documents.
+
+    - Memory tier: LRU capped at `max_docs` documents.
+    - Disk tier (optional): one compressed .npz per document, so indexes
+      survive restarts and evicted documents can be reloaded. Capped at
+      `max_disk_docs` files; the least recently used are deleted first.
+    """
+
+    def __init__(
+        self,
+        max_docs: int,
+        disk_dir: Optional[Path] = None,
+        max_disk_docs: int = DOCUMENT_STORE_DISK_MAX_DOCS,
+    ):
+        self.max_docs = max_docs
+        self.max_disk_docs = max_disk_docs
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._docs: "OrderedDict[str, Document]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, doc_id: str) -> Path:
+        return self.disk_dir / f"{doc_id}.npz"
+
+    def _remember(self, doc: Document) -> None:
+        with self._lock:
+            self._docs[doc.doc_id] = doc
+            self._docs.move_to_end(doc.doc_id)
+            while len(self._docs) > self.max_docs:
+                self._docs.popitem(last=False)
+
+    def _save(self, doc: Document) -> None:
+        if self.disk_dir is None:
+            return
+        tmp_path = self.disk_dir / f"{doc.doc_id}.{threading.get_ident()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            text=np.array(doc.text),
+            spans=doc.spans,
+            embeddings=doc.embeddings,
+            **doc.bm25.to_arrays(),
+        )
+        tmp_path.replace(self._disk_path(doc.doc_id))
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """
+        Delete the least recently used .npz files beyond max_disk_docs
+        (a file's mtime is refreshed whenever it is loaded).
+        """
+        files = []
+        for path in self.disk_dir.glob("*.npz"):
+            if not is_document_id(path.stem):  # temp files of running saves
+                continue
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        files.sort()
+        for _, path in files[: max(0, len(files) - self.max_disk_docs)]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load(self, doc_id: str) -> Optional[Document]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(doc_id)
+        if not path.exists():
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:  # pruned meanwhile
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            doc = Document(
+                doc_id=doc_id,
+                text=str(data["text"]),
+                spans=data["spans"],
+                embeddings=data["embeddings"],
+            )
+            if "bm25_terms" in data.files:
+                doc.bm25 = BM25Index.from_arrays(data, doc.num_chunks)
+        if doc.bm25 is None:  # saved before documents carried a BM25 index
+            doc.bm25 = build_sparse_index(doc.chunk_texts())
+        return doc
+
+    def add(self, text: str) -> Document:
+        """
+        Chunk + embed `text` (unless it is already registered) and return it.
+        """
+        doc_id = document_id(text)
+        existing = self.get(doc_id)
+        if existing is not None:
+            return existing
+
+        spans = document_spans(text)
+        chunks = [text[start:end] for start, end in spans]
+        embeddings = embed_chunks(chunks)
+        doc = Document(
+            doc_id=doc_id,
+            text=text,
+            spans=np.asarray(spans, dtype=np.int32).reshape(-1, 2),
+            embeddings=np.asarray(embeddings, dtype=np.float32),
+            bm25=build_sparse_index(chunks),
+        )
+        self._save(doc)
+        self._remember(doc)
+        return doc
+
+    def get(self, doc_id: str) -> Optional[Document]:
+        if not is_document_id(doc_id):
+            return None
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            if doc is not None:
+                self._docs.move_to_end(doc_id)
+                return doc
+        doc = self._load(doc_id)
+        if doc is not None:
+            self._remember(doc)
+        return doc
+
+    def delete(self, doc_id: str) -> bool:
+        if not is_document_id(doc_id):
+            return False
+        with self._lock:
+            found = self._docs.pop(doc_id, None) is not None
+        if self.disk_dir is not None:
+            path = self._disk_path(doc_id)
+            if path.exists():
+                path.unlink()
+                found = True
+        return found
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents_in_memory": len(self._docs),
+                "max_docs": self.max_docs,
+                "bytes_in_memory": sum(
+                    d.spans.nbytes + d.embeddings.nbytes + len(d.text)
+                    + (d.bm25.weights.data.nbytes if d.bm25 is not None else 0)
+                    for d in self._docs.values()
+                ),
+                "disk_enabled": self.disk_dir is not None,
+                "max_disk_docs": self.max_disk_docs,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_document_store() -> DocumentStore:
+    """
+    Process-wide document registry, created once.
+    """
+    return DocumentStore(
+        max_docs=DOCUMENT_STORE_MAX_DOCS,
+        disk_dir=DOCUMENT_STORE_DIR,
+        max_disk_docs=DOCUMENT_STORE_DISK_MAX_DOCS,
+    )
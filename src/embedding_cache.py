@@ -0,0 +1,231 @@
+# src/embedding_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_DISK_MAX_BYTES, EMBEDDING_CACHE_MAX_BYTES
+
+# Chunk embeddings are deterministic for a given (model, text) pair, so we can
+# key them by content hash and skip re-encoding the same bill on every request.
+
+
+def embedding_key(text: str, model_name: str) -> str:
+    """
+    Content-addressed key for one chunk: sha256 over model name + chunk text.
+    """
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for chunk embeddings.
+
+    - Memory tier: LRU bounded by total bytes of the stored vectors.
+    - Disk tier (optional): one .npy file per key, sharded by key prefix,
+      bounded by `disk_max_bytes`. A file's mtime is its last use; when the
+      tier is over budget the least recently used files are deleted.
+    """
+
+    # Pruning goes down to this fraction of the budget, so it runs rarely
+    DISK_PRUNE_TARGET = 0.9
+
+    def __init__(
+        self,
+        max_bytes: int,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: int = EMBEDDING_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---- disk tier ----
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.npy"
+
+    def _disk_files(self) -> List[tuple]:
+        """
+        (mtime, size, path) of every cached vector on disk.
+        """
+        files = []
+        for path in self.disk_dir.glob("*/*.npy"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:  # pruned meanwhile
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _prune_disk(self) -> None:
+        """
+        Delete least recently used files until the tier is under budget.
+        Sizes are re-read from disk, so files written by other processes
+        sharing the directory are counted too.
+        """
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * self.DISK_PRUNE_TARGET
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    def _load_from_disk(self, key: str) -> Optional[np.ndarray]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            vector = np.load(path)
+            os.utime(path)  # mark as recently used
+            return vector
+        except (OSError, ValueError):
+            # Corrupt / partially written (or just pruned) file: treat as a miss
+            return None
+
+    def _save_to_disk(self, key: str, vector: np.ndarray) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so readers never see half a vector
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, vector)
+        tmp_path.replace(path)
+
+        with self._disk_lock:
+            self._disk_bytes += path.stat().st_size
+            if self._disk_bytes > self.disk_max_bytes:
+                self._prune_disk()
+
+    # ---- memory tier ----
+
+    def _put_memory(self, key: str, vector: np.ndarray) -> None:
+        if vector.nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    # ---- public API ----
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up several keys at once. Returns only the keys that were found.
+        """
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+        # Disk reads happen outside the lock
+        for key in missing:
+            vector = self._load_from_disk(key)
+            with self._lock:
+                if vector is not None:
+                    self._put_memory(key, vector)
+                    found[key] = vector
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """
+        Store freshly computed embeddings in memory (and on disk if enabled).
+        """
+        with self._lock:
+            for key, vector in items.items():
+                self._put_memory(key, vector)
+        for key, vector in items.items():
+            try:
+                self._save_to_disk(key, vector)
+            except OSError as e:
+                print(f"Embedding cache: failed to write {key[:12]}... to disk: {e}")
+
+    def clear(self) -> None:
+        """
+        Drop the memory tier (the disk tier is left untouched).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (hits / lookups) if lookups else 0.0,
+                "disk_enabled": self.disk_dir is not None,
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Process-wide embedding cache, created once.
+    """
+    return EmbeddingCache(
+        max_bytes=EMBEDDING_CACHE_MAX_BYTES,
+        disk_dir=EMBEDDING_CACHE_DIR,
+        disk_max_bytes=EMBEDDING_CACHE_DISK_MAX_BYTES,
+    )
@@ -84,22 +84,54 @@
 #     return answer
 # src/groq_qa.py
 
+import asyncio
+import json
 import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
 import requests
 
 from dotenv import load_dotenv
 load_dotenv()  # load .env file
 
+from .config import GROQ_MAX_CONTEXT_TOKENS
+from .context_packer import count_tokens, truncate_to_tokens
+from .metrics import observe, timed
+from .rate_limiter import RateLimitExceeded, get_groq_rate_limiter, parse_duration
+from .single_flight import flight_key, get_single_flight
+from .response_cache import get_response_cache, response_key
+
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Base URL is configurable so we can point the client at a local stub server
+GROQ_API_BASE_URL = os.getenv("GROQ_API_BASE_URL", "https://api.groq.com/openai/v1")
+GROQ_API_URL = f"{GROQ_API_BASE_URL.rstrip('/')}/chat/completions"
 
 # Use the Groq model you have access to; adjust if needed
 GROQ_MODEL_NAME = "llama-3.1-8b-instant"  # or "llama3-70b-8192"
 
-# Rough safety limit so we don't exceed Groq's token cap
-# ~ 4 chars ≈ 1 token, 6000 tokens ≈ 24,000 chars => we use 20,000 to be safe
-MAX_CONTEXT_CHARS = 20000
+# Safety limit so we don't exceed Groq's token cap, counted in real tokens
+MAX_CONTEXT_TOKENS = GROQ_MAX_CONTEXT_TOKENS
+
+# ---- HTTP client settings ----
+
+# Overall deadline for one call, including retries (seconds)
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "30"))
+
+# Max in-flight requests to Groq from this process
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+
+# Retries on 429 / 5xx / connection errors, with jittered exponential backoff
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_BACKOFF_BASE_SECONDS = 0.5
+GROQ_BACKOFF_MAX_SECONDS = 8.0
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
 
 
 def _build_prompt(question: str, context: str) -> str:
@@ -121,29 +153,37 @@ Answer in 2–4 sentences in clear, formal English.
 """
 
 
-def answer_question_groq(question: str, context: str) -> str:
+def _build_summary_prompt(text: str) -> str:
     """
-    Call Groq LLM (Llama 3) to answer a question based on context.
-    Returns a natural language answer as a string.
+    Build a summarization prompt for Groq (Llama3).
     """
+    return f"""You are a legal document summarization assistant.
+
+Summarize the following legal or policy text in clear, concise English.
+Focus on the main obligations, rights, actors, and conditions.
+Use 4–8 sentences. Do not add any information that is not present in the text.
 
+TEXT:
+{text}
+"""
+
+
+def _check_api_key() -> None:
     if not GROQ_API_KEY:
         raise RuntimeError(
             "GROQ_API_KEY is not set in environment. Please export it before running."
         )
 
-    # 🔹 Truncate very long context to avoid Groq 413 / token-limit errors
-    if len(context) > MAX_CONTEXT_CHARS:
-        context = context[:MAX_CONTEXT_CHARS]
-
-    prompt = _build_prompt(question, context)
 
-    headers = {
+def _headers() -> dict:
+    return {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json",
     }
 
-    payload = {
+
+def _build_payload(prompt: str, temperature: float, max_tokens: int) -> dict:
+    return {
         "model": GROQ_MODEL_NAME,
         "messages": [
             {
@@ -151,89 +191,432 @@ def answer_question_groq(question: str, context: str) -> str:
                 "content": prompt,
             }
         ],
-        "temperature": 0.2,
-        "max_tokens": 256,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
     }
 
-    response = requests.post(
-        GROQ_API_URL,
-        headers=headers,
-        json=payload,
-        timeout=30,
-    )
-
-    if response.status_code != 200:
-        raise RuntimeError(
-            f"Groq API error {response.status_code}: {response.text}"
-        )
 
-    data = response.json()
+def _parse_answer(data: dict) -> str:
     try:
-        answer = data["choices"][0]["message"]["content"].strip()
+        return data["choices"][0]["message"]["content"].strip()
     except (KeyError, IndexError) as e:
         raise RuntimeError(f"Unexpected Groq API response format: {e}, data={data}")
 
-    return answer
 
-def _build_summary_prompt(text: str) -> str:
+def _truncate_context(context: str) -> str:
+    # 🔹 Truncate very long context to avoid Groq 413 / token-limit errors
+    return truncate_to_tokens(context, MAX_CONTEXT_TOKENS)
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
     """
-    Build a summarization prompt for Groq (Llama3).
+    Delay before retry number `attempt` (0-based).
+    Honors a numeric Retry-After header, otherwise full-jitter exponential backoff.
     """
-    return f"""You are a legal document summarization assistant.
+    if retry_after:
+        try:
+            return min(float(retry_after), GROQ_BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+    cap = min(GROQ_BACKOFF_MAX_SECONDS, GROQ_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, cap)
 
-Summarize the following legal or policy text in clear, concise English.
-Focus on the main obligations, rights, actors, and conditions.
-Use 4–8 sentences. Do not add any information that is not present in the text.
 
-TEXT:
-{text}
-"""
+# ---- Rate limiting (see src/rate_limiter.py) ----
+
+# Chat-format overhead per message (role markers), on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
 
 
-def summarize_with_groq(text: str, max_tokens: int = 256) -> str:
+def _estimate_tokens(payload: dict) -> int:
     """
-    Summarize a legal/policy text using Groq LLM (Llama3).
+    Tokens a call counts against the TPM budget: prompt tokens plus the
+    max_tokens completion budget (Groq reserves it up front).
     """
-    if not GROQ_API_KEY:
-        raise RuntimeError(
-            "GROQ_API_KEY is not set in environment. Please export it before running."
-        )
+    contents = [m["content"] for m in payload["messages"]]
+    prompt_tokens = sum(count_tokens(contents)) + MESSAGE_OVERHEAD_TOKENS * len(contents)
+    return prompt_tokens + int(payload.get("max_tokens") or 0)
 
-    prompt = _build_summary_prompt(text)
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
+def _note_response(status_code: int, headers, attempt: int) -> None:
+    """
+    Feed rate-limit headers back to the limiter; a 429 pauses all calls.
+    """
+    limiter = get_groq_rate_limiter()
+    if limiter is None:
+        return
+    limiter.update_from_headers(headers)
+    if status_code == 429:
+        limiter.pause(parse_duration(headers.get("Retry-After")) or _retry_delay(attempt, None))
 
-    payload = {
-        "model": GROQ_MODEL_NAME,
-        "messages": [
-            {
-                "role": "user",
-                "content": prompt,
-            }
-        ],
-        "temperature": 0.2,
-        "max_tokens": max_tokens,
-    }
 
-    response = requests.post(
-        GROQ_API_URL,
-        headers=headers,
-        json=payload,
-        timeout=30,
-    )
+def _rate_limited(response_text: str, headers) -> RateLimitExceeded:
+    retry_after = parse_duration(headers.get("Retry-After")) or GROQ_BACKOFF_MAX_SECONDS
+    return RateLimitExceeded(f"Groq API rate limit (429): {response_text}", retry_after=retry_after)
 
-    if response.status_code != 200:
-        raise RuntimeError(
-            f"Groq API error {response.status_code}: {response.text}"
+
+# ---- Sync client (shared keep-alive session) ----
+
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=GROQ_MAX_CONCURRENCY,
+            )
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _post_chat(payload: dict, timeout: float = GROQ_TIMEOUT_SECONDS) -> dict:
+    """
+    POST a chat completion over the shared session, with retries and a deadline.
+    Every attempt first takes its turn from the rate limiter.
+    """
+    _check_api_key()
+    limiter = get_groq_rate_limiter()
+    tokens = _estimate_tokens(payload) if limiter is not None else 0
+    deadline = time.monotonic() + timeout
+
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if limiter is not None:
+            limiter.acquire(tokens, timeout=remaining)
+            remaining = deadline - time.monotonic()
+        try:
+            with timed("groq_http_seconds"):
+                response = _get_session().post(
+                    GROQ_API_URL,
+                    headers=_headers(),
+                    json=payload,
+                    timeout=remaining,
+                )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == GROQ_MAX_RETRIES:
+                raise RuntimeError(f"Groq API request failed: {e}")
+            time.sleep(min(_retry_delay(attempt, None), max(0.0, deadline - time.monotonic())))
+            continue
+
+        _note_response(response.status_code, response.headers, attempt)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 429 and attempt == GROQ_MAX_RETRIES:
+            raise _rate_limited(response.text, response.headers)
+        if response.status_code not in RETRYABLE_STATUS_CODES or attempt == GROQ_MAX_RETRIES:
+            raise RuntimeError(
+                f"Groq API error {response.status_code}: {response.text}"
+            )
+        delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+        time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+
+    raise RuntimeError(f"Groq API deadline of {timeout:.0f}s exceeded")
+
+
+# ---- Async client (pooled, keep-alive, bounded concurrency) ----
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """
+    Shared AsyncClient for this process. Connections are pooled and kept alive
+    across requests, so only the first call pays the TCP+TLS handshake.
+    """
+    global _async_client, _async_semaphore
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONCURRENCY,
+                max_keepalive_connections=GROQ_MAX_CONCURRENCY,
+            ),
+            timeout=GROQ_TIMEOUT_SECONDS,
         )
+        _async_semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    return _async_client
+
+
+async def close_groq_client() -> None:
+    """
+    Close the shared async client (call on application shutdown).
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def _post_chat_async(payload: dict, timeout: float = GROQ_TIMEOUT_SECONDS) -> dict:
+    """
+    Async version of _post_chat: bounded by GROQ_MAX_CONCURRENCY, retried on
+    429/5xx with jittered backoff, and never running past `timeout` seconds.
+    """
+    _check_api_key()
+    client = _get_async_client()
+    loop = asyncio.get_running_loop()
+    limiter = get_groq_rate_limiter()
+    tokens = await asyncio.to_thread(_estimate_tokens, payload) if limiter is not None else 0
+    deadline = loop.time() + timeout
+
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        if limiter is not None:
+            await limiter.acquire_async(tokens, timeout=remaining)
+            remaining = deadline - loop.time()
+        try:
+            async with _async_semaphore:
+                with timed("groq_http_seconds"):
+                    response = await asyncio.wait_for(
+                        client.post(GROQ_API_URL, headers=_headers(), json=payload),
+                        timeout=remaining,
+                    )
+        except asyncio.TimeoutError:
+            break
+        except httpx.TransportError as e:
+            if attempt == GROQ_MAX_RETRIES:
+                raise RuntimeError(f"Groq API request failed: {e}")
+            await asyncio.sleep(min(_retry_delay(attempt, None), max(0.0, deadline - loop.time())))
+            continue
+
+        _note_response(response.status_code, response.headers, attempt)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 429 and attempt == GROQ_MAX_RETRIES:
+            raise _rate_limited(response.text, response.headers)
+        if response.status_code not in RETRYABLE_STATUS_CODES or attempt == GROQ_MAX_RETRIES:
+            raise RuntimeError(
+                f"Groq API error {response.status_code}: {response.text}"
+            )
+        delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+        await asyncio.sleep(min(delay, max(0.0, deadline - loop.time())))
+
+    raise RuntimeError(f"Groq API deadline of {timeout:.0f}s exceeded")
+
+
+class _RetryableStreamError(Exception):
+    """Raised inside _stream_chat_async to trigger a retry before any tokens."""
+
+    def __init__(self, retry_after: Optional[str]):
+        self.retry_after = retry_after
+
+
+async def _stream_chat_async(payload: dict, timeout: float = GROQ_TIMEOUT_SECONDS):
+    """
+    Stream a chat completion (OpenAI-compatible `stream: true` mode).
+    Yields content deltas as they arrive. Retries only happen before the
+    first byte of the response; once tokens flow, errors are raised.
+    Like _post_chat_async, rate-limit waits and retries before the stream
+    starts never run past `timeout` seconds.
+    """
+    _check_api_key()
+    client = _get_async_client()
+    loop = asyncio.get_running_loop()
+    payload = {**payload, "stream": True}
+    started = False
+    limiter = get_groq_rate_limiter()
+    tokens = await asyncio.to_thread(_estimate_tokens, payload) if limiter is not None else 0
+    deadline = loop.time() + timeout
+
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        if limiter is not None:
+            await limiter.acquire_async(tokens, timeout=remaining)
+        try:
+            async with _async_semaphore:
+                async with client.stream(
+                    "POST", GROQ_API_URL, headers=_headers(), json=payload
+                ) as response:
+                    _note_response(response.status_code, response.headers, attempt)
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        if response.status_code == 429 and attempt == GROQ_MAX_RETRIES:
+                            raise _rate_limited(body, response.headers)
+                        if (
+                            response.status_code in RETRYABLE_STATUS_CODES
+                            and attempt < GROQ_MAX_RETRIES
+                        ):
+                            retry_after = response.headers.get("Retry-After")
+                            raise _RetryableStreamError(retry_after)
+                        raise RuntimeError(
+                            f"Groq API error {response.status_code}: {body}"
+                        )
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            return
+                        try:
+                            delta = json.loads(data)["choices"][0]["delta"].get("content")
+                        except (ValueError, KeyError, IndexError) as e:
+                            raise RuntimeError(f"Unexpected Groq stream chunk: {e}, data={data}")
+                        if delta:
+                            started = True
+                            yield delta
+                    return
+        except _RetryableStreamError as e:
+            delay = _retry_delay(attempt, e.retry_after)
+            await asyncio.sleep(min(delay, max(0.0, deadline - loop.time())))
+        except httpx.TransportError as e:
+            if started or attempt == GROQ_MAX_RETRIES:
+                raise RuntimeError(f"Groq API request failed: {e}")
+            await asyncio.sleep(min(_retry_delay(attempt, None), max(0.0, deadline - loop.time())))
+
+    raise RuntimeError(f"Groq API deadline of {timeout:.0f}s exceeded")
+
+
+# ---- Response cache ----
+
+def _complete(prompt: str, temperature: float, max_tokens: int, use_cache: bool = True):
+    """
+    Run one completion, consulting the response cache first. Identical
+    completions already in flight are waited for instead of sent again.
+    Returns (text, cache_meta) where cache_meta = {"hit": bool, "tier": str | None}.
+    """
+    observe("groq_prompt_chars", len(prompt))
+    cache = get_response_cache()
+    key = response_key(GROQ_MODEL_NAME, prompt, temperature, max_tokens)
+    if use_cache:
+        value, tier = cache.get(key)
+        if value is not None:
+            return value, {"hit": True, "tier": tier}
+
+    def _send():
+        data = _post_chat(_build_payload(prompt, temperature=temperature, max_tokens=max_tokens))
+        text = _parse_answer(data)
+        if use_cache:
+            cache.put(key, text)
+        return text, {"hit": False, "tier": None}
+
+    return get_single_flight("groq_complete").do(flight_key(key, use_cache), _send)
+
+
+async def _complete_async(prompt: str, temperature: float, max_tokens: int, use_cache: bool = True):
+    """
+    Async version of _complete. Cache reads and writes (SQLite on the disk
+    tier) run on a worker thread, off the event loop.
+    """
+    observe("groq_prompt_chars", len(prompt))
+    cache = get_response_cache()
+    key = response_key(GROQ_MODEL_NAME, prompt, temperature, max_tokens)
+    if use_cache:
+        value, tier = await asyncio.to_thread(cache.get, key)
+        if value is not None:
+            return value, {"hit": True, "tier": tier}
+
+    async def _send():
+        data = await _post_chat_async(_build_payload(prompt, temperature=temperature, max_tokens=max_tokens))
+        text = _parse_answer(data)
+        if use_cache:
+            await asyncio.to_thread(cache.put, key, text)
+        return text, {"hit": False, "tier": None}
+
+    return await get_single_flight("groq_complete").do_async(flight_key(key, use_cache), _send)
+
+
+async def _complete_stream(prompt: str, temperature: float, max_tokens: int, use_cache: bool = True):
+    """
+    Streaming version of _complete_async. A cache hit is yielded as one piece;
+    a fresh completion is cached once the stream has finished (unless use_cache
+    is off: then the cache is neither read nor written).
+    """
+    observe("groq_prompt_chars", len(prompt))
+    cache = get_response_cache()
+    key = response_key(GROQ_MODEL_NAME, prompt, temperature, max_tokens)
+    if use_cache:
+        value, _ = await asyncio.to_thread(cache.get, key)
+        if value is not None:
+            yield value
+            return
+
+    parts = []
+    payload = _build_payload(prompt, temperature=temperature, max_tokens=max_tokens)
+    async for delta in _stream_chat_async(payload):
+        parts.append(delta)
+        yield delta
+    if use_cache:
+        await asyncio.to_thread(cache.put, key, "".join(parts).strip())
+
+
+def groq_cache_stats() -> dict:
+    """
+    Hit/miss counters for the Groq response cache.
+    """
+    return get_response_cache().stats()
 
-    data = response.json()
-    try:
-        answer = data["choices"][0]["message"]["content"].strip()
-    except (KeyError, IndexError) as e:
-        raise RuntimeError(f"Unexpected Groq API response format: {e}, data={data}")
 
+# ---- Public API ----
+
+def answer_question_groq(question: str, context: str, use_cache: bool = True) -> str:
+    """
+    Call Groq LLM (Llama 3) to answer a question based on context.
+    Returns a natural language answer as a string.
+    """
+    prompt = _build_prompt(question, _truncate_context(context))
+    answer, _ = _complete(prompt, temperature=0.2, max_tokens=256, use_cache=use_cache)
     return answer
+
+
+async def answer_question_groq_async(question: str, context: str, use_cache: bool = True) -> dict:
+    """
+    Async version of answer_question_groq (does not block a worker thread).
+    Returns {"answer": str, "cache": {"hit": bool, "tier": str | None}}.
+    """
+    prompt = _build_prompt(question, await asyncio.to_thread(_truncate_context, context))
+    answer, cache_meta = await _complete_async(
+        prompt, temperature=0.2, max_tokens=256, use_cache=use_cache
+    )
+    return {"answer": answer, "cache": cache_meta}
+
+
+def summarize_with_groq(text: str, max_tokens: int = 256, use_cache: bool = True) -> str:
+    """
+    Summarize a legal/policy text using Groq LLM (Llama3).
+    """
+    prompt = _build_summary_prompt(_truncate_context(text))
+    summary, _ = _complete(prompt, temperature=0.2, max_tokens=max_tokens, use_cache=use_cache)
+    return summary
+
+
+async def summarize_with_groq_async(text: str, max_tokens: int = 256, use_cache: bool = True) -> dict:
+    """
+    Async version of summarize_with_groq (does not block a worker thread).
+    Returns {"summary": str, "cache": {"hit": bool, "tier": str | None}}.
+    """
+    prompt = _build_summary_prompt(await asyncio.to_thread(_truncate_context, text))
+    summary, cache_meta = await _complete_async(
+        prompt, temperature=0.2, max_tokens=max_tokens, use_cache=use_cache
+    )
+    return {"summary": summary, "cache": cache_meta}
+
+
+async def stream_answer_question_groq(question: str, context: str, use_cache: bool = True):
+    """
+    Streaming version of answer_question_groq: yields answer text pieces.
+    """
+    prompt = _build_prompt(question, await asyncio.to_thread(_truncate_context, context))
+    async for delta in _complete_stream(prompt, temperature=0.2, max_tokens=256, use_cache=use_cache):
+        yield delta
+
+
+async def stream_summarize_with_groq(text: str, max_tokens: int = 256, use_cache: bool = True):
+    """
+    Streaming version of summarize_with_groq: yields summary text pieces.
+    """
+    prompt = _build_summary_prompt(await asyncio.to_thread(_truncate_context, text))
+    async for delta in _complete_stream(prompt, temperature=0.2, max_tokens=max_tokens, use_cache=use_cache):
+        yield delta
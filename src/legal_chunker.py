@@ -0,0 +1,161 @@
+# src/legal_chunker.py
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import List, Tuple
+
+from .config import CHUNK_MAX_TOKENS, EMBEDDING_MODEL_NAME
+
+# Structure-aware chunking for bill text. Chunks follow the SECTION / (a) / (1)
+# layout of BillSum documents instead of punkt sentence windows. They are
+# returned as (start, end) character offsets into the source, so nothing is
+# copied and callers can always map a chunk back to its position.
+
+# "SECTION 1." / "SEC. 2." / "Sec. 101." at the start of a line
+SECTION_RE = re.compile(r"^[ \t]*(?:SECTION|SEC\.|Sec\.)[ \t]+\d+[A-Za-z-]*\.", re.MULTILINE)
+
+# "(a)", "(1)", "(A)", "(iv)" opening a line
+SUBDIVISION_RE = re.compile(r"^[ \t]*\((?:[a-z]{1,4}|[A-Z]{1,2}|\d{1,3})\)", re.MULTILINE)
+
+# Blank line(s) between paragraphs
+PARAGRAPH_RE = re.compile(r"\n[ \t]*\n")
+
+# Where a single oversized unit may be split
+SENTENCE_BREAK_RE = re.compile(r"(?<=[.;:])\s+")
+
+# Words and punctuation marks: only used if the embedder's tokenizer cannot be
+# loaded (and then the embedder itself cannot be loaded either)
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# (start, end, tokens, starts a section)
+Unit = Tuple[int, int, int, bool]
+
+
+@lru_cache(maxsize=1)
+def load_chunk_tokenizer():
+    """
+    Load the embedder's tokenizer once, so chunks are capped in the word
+    pieces the embedder actually sees. Returns None if it cannot be loaded.
+    """
+    try:
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME)
+    except Exception as e:
+        print(f"Chunk tokenizer unavailable ({e}); counting words and punctuation instead")
+        return None
+
+
+def token_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) character offsets of every embedder word piece in `text`,
+    from a single tokenizer call over the whole document.
+    """
+    tokenizer = load_chunk_tokenizer()
+    if tokenizer is None:
+        return [m.span() for m in TOKEN_RE.finditer(text)]
+    offsets = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )["offset_mapping"]
+    return [(s, e) for s, e in offsets if e > s]
+
+
+def _strip(text: str, start: int, end: int):
+    """
+    [start, end) without leading/trailing whitespace, or None if blank.
+    """
+    segment = text[start:end]
+    stripped = segment.strip()
+    if not stripped:
+        return None
+    start += len(segment) - len(segment.lstrip())
+    return start, start + len(stripped)
+
+
+def _split_long(
+    text: str,
+    start: int,
+    end: int,
+    max_tokens: int,
+    new_section: bool,
+    spans: List[Tuple[int, int]],
+    starts: List[int],
+) -> List[Unit]:
+    """
+    Split one unit that is over the token cap at sentence breaks,
+    and between tokens as a last resort.
+    """
+    pieces = []
+    piece_start = start
+    for m in SENTENCE_BREAK_RE.finditer(text, start, end):
+        pieces.append((piece_start, m.start()))
+        piece_start = m.end()
+    pieces.append((piece_start, end))
+
+    units: List[Unit] = []
+    for s, e in pieces:
+        tokens = spans[bisect_left(starts, s) : bisect_left(starts, e)]
+        for i in range(0, len(tokens), max_tokens):
+            window = tokens[i : i + max_tokens]
+            units.append((window[0][0], window[-1][1], len(window), new_section and not units))
+    return units
+
+
+def _units(text: str, max_tokens: int) -> List[Unit]:
+    """
+    Structural units: the text between consecutive section headers,
+    subdivision markers and paragraph breaks.
+    """
+    spans = token_spans(text)
+    starts = [s for s, _ in spans]
+
+    sections = {m.start() for m in SECTION_RE.finditer(text)}
+    cuts = set(sections)
+    cuts.update(m.start() for m in SUBDIVISION_RE.finditer(text))
+    cuts.update(m.end() for m in PARAGRAPH_RE.finditer(text))
+    cuts.add(0)
+    cuts = sorted(cuts)
+
+    units: List[Unit] = []
+    for cut, next_cut in zip(cuts, cuts[1:] + [len(text)]):
+        span = _strip(text, cut, next_cut)
+        if span is None:
+            continue
+        start, end = span
+        n_tokens = bisect_left(starts, end) - bisect_left(starts, start)
+        if n_tokens > max_tokens:
+            units.extend(_split_long(text, start, end, max_tokens, cut in sections, spans, starts))
+        else:
+            units.append((start, end, n_tokens, cut in sections))
+    return units
+
+
+def legal_chunk_spans(text: str, max_tokens: int = CHUNK_MAX_TOKENS) -> List[Tuple[int, int]]:
+    """
+    Split bill text into chunks of whole structural units, as (start, end)
+    character offsets into `text`.
+
+    - Every SECTION / SEC. header starts a new chunk, so chunks never span
+      two sections.
+    - Consecutive subdivisions and paragraphs of a section are merged until
+      the next one would take the chunk over `max_tokens` embedder word pieces.
+    - A single unit over the cap is split at sentence breaks (or between
+      tokens if it has none).
+    """
+    chunks = []
+    chunk_start = chunk_end = None
+    chunk_tokens = 0
+    for start, end, n_tokens, new_section in _units(text, max_tokens):
+        if chunk_start is not None and (new_section or chunk_tokens + n_tokens > max_tokens):
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = None
+        if chunk_start is None:
+            chunk_start, chunk_tokens = start, 0
+        chunk_end = end
+        chunk_tokens += n_tokens
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+    return chunks
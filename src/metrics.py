@@ -0,0 +1,184 @@
+# src/metrics.py
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Minimal in-process metrics: histograms rendered in the Prometheus text
+# format for /metrics, plus per-request stage timings for the Server-Timing
+# response header.
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000)
+
+HELP = {
+    "model_load_seconds": "Time to load a model into memory.",
+    "rag_sentence_tokenize_seconds": "Time spent in punkt sent_tokenize while chunking.",
+    "rag_chunk_seconds": "Time to split a document into legal-structure chunks.",
+    "rag_embed_seconds": "Time a request waits for its chunk embeddings.",
+    "rag_embed_batch_seconds": "Time spent in one batched SentenceTransformer.encode call.",
+    "rag_embed_batch_size": "Texts per batched encode call.",
+    "rag_query_embed_seconds": "Time a request waits for its query embedding.",
+    "rag_retrieve_seconds": "Time to score and rank chunks for a query.",
+    "rag_bm25_build_seconds": "Time to build a document's BM25 index.",
+    "rag_bm25_seconds": "Time to score chunks with BM25.",
+    "rag_chunks": "Chunks per indexed document.",
+    "rag_pack_seconds": "Time to pack ranked chunks into the prompt token budget.",
+    "rag_context_tokens": "Context tokens in a packed RAG prompt.",
+    "prompt_tokenize_seconds": "Time spent counting Groq prompt tokens.",
+    "groq_http_seconds": "Round-trip time of one Groq HTTP attempt.",
+    "groq_prompt_chars": "Prompt size sent to Groq, in characters.",
+    "groq_rate_wait_seconds": "Time a Groq call waited for the client-side rate limiter.",
+    "qa_tokenize_seconds": "Time to tokenize question + context into windows.",
+    "qa_forward_seconds": "Time spent in QA model forward passes.",
+    "qa_input_tokens": "Tokens per QA window batch.",
+    "qa_windows": "Sliding windows per QA request.",
+    "summarizer_tokenize_seconds": "Time to tokenize summarization inputs.",
+    "summarizer_generate_seconds": "Time spent in T5 generate.",
+    "summarizer_input_tokens": "Input tokens per summarization batch.",
+    "summarizer_batch_size": "Requests per batched generate call.",
+    "summarize_request_seconds": "Time a summarize_text call waits for its batched result.",
+    "search_query_embed_seconds": "Time to embed a /search query.",
+    "search_seconds": "Time to search the corpus (ANN + exact re-rank).",
+    "ner_seconds": "Time spent running the spaCy pipeline.",
+    "ner_input_chars": "Characters per NER document.",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, name: str, buckets):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[dict] = None) -> None:
+        key = tuple(sorted((labels or {}).items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {HELP.get(self.name, self.name)}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(key, le=bound)} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(key)} {series[-1]}")
+        return lines
+
+
+def _labels(key: LabelKey, **extra) -> str:
+    items = list(key) + [(k, str(v)) for k, v in extra.items()]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+_histograms: Dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+
+# name -> (type, help, callback returning {labels dict as tuple: value})
+_callbacks: Dict[str, Tuple[str, str, Callable[[], Dict[LabelKey, float]]]] = {}
+
+
+def _histogram(name: str) -> Histogram:
+    hist = _histograms.get(name)
+    if hist is None:
+        with _registry_lock:
+            hist = _histograms.get(name)
+            if hist is None:
+                buckets = TIME_BUCKETS if name.endswith("_seconds") else SIZE_BUCKETS
+                hist = _histograms[name] = Histogram(name, buckets)
+    return hist
+
+
+def register_callback(name: str, metric_type: str, help_text: str, fn) -> None:
+    """
+    Register a gauge/counter whose values are read at scrape time.
+    `fn` returns {((label, value), ...): number}.
+    """
+    _callbacks[name] = (metric_type, help_text, fn)
+
+
+# ---- per-request stage timings (Server-Timing) ----
+
+_request_timings: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timings() -> list:
+    """
+    Begin collecting stage timings for the current request.
+    Worker threads started with a copy of this context append to the same list.
+    """
+    timings: list = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: list) -> str:
+    """
+    Format collected (stage, seconds) pairs as a Server-Timing header value,
+    summing repeated stages.
+    """
+    totals: Dict[str, float] = {}
+    for stage, seconds in list(timings):
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000.0:.1f}" for stage, seconds in totals.items())
+
+
+# ---- recording ----
+
+def observe(name: str, value: float, labels: Optional[dict] = None) -> None:
+    _histogram(name).observe(value, labels)
+
+
+@contextmanager
+def timed(name: str, labels: Optional[dict] = None):
+    """
+    Time a block: record it in histogram `name` and in the current request's
+    Server-Timing entries (as `name` without the `_seconds` suffix).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(name, elapsed, labels)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name[: -len("_seconds")] if name.endswith("_seconds") else name, elapsed))
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for name in sorted(_histograms):
+        lines.extend(_histograms[name].render())
+    for name, (metric_type, help_text, fn) in sorted(_callbacks.items()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for key, value in sorted(fn().items()):
+            lines.append(f"{name}{_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
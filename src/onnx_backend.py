@@ -0,0 +1,112 @@
+# src/onnx_backend.py
+
+from __future__ import annotations
+
+import platform
+import re
+from pathlib import Path
+from typing import Union
+
+from .config import ONNX_MODELS_DIR
+
+# CPU inference backend: export Hugging Face models to ONNX once, apply dynamic
+# int8 quantization, and run them with ONNX Runtime through Optimum's ORTModel
+# classes. ORTModelForSeq2SeqLM implements generate(), so T5 keeps the same
+# beam-search / streaming code path (encoder + decoder-with-past sessions).
+
+
+def _require_optimum():
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "INFERENCE_BACKEND='onnx' needs Optimum with ONNX Runtime. "
+            "Install it with: pip install 'optimum[onnxruntime]'"
+        ) from e
+
+
+def _cache_dir(source: Union[str, Path], kind: str) -> Path:
+    """
+    models/onnx/<kind>/<sanitized model name or path>
+    """
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "--", str(source)).strip("-")
+    return ONNX_MODELS_DIR / kind / name
+
+
+def _quantization_config():
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    # Dynamic quantization: weights int8 ahead of time, activations at runtime
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+
+def _export_and_quantize(ort_model_cls, source: Union[str, Path], kind: str) -> Path:
+    """
+    Export `source` to ONNX and quantize every graph it produced.
+    Returns the directory holding the *_quantized.onnx files (cached on disk).
+    """
+    from optimum.onnxruntime import ORTQuantizer
+    from transformers import AutoTokenizer
+
+    base_dir = _cache_dir(source, kind)
+    export_dir = base_dir / "fp32"
+    quant_dir = base_dir / "int8"
+    if quant_dir.exists() and any(quant_dir.glob("*_quantized.onnx")):
+        return quant_dir
+
+    print(f"Exporting {source} to ONNX in {export_dir}")
+    model = ort_model_cls.from_pretrained(source, export=True)
+    model.save_pretrained(export_dir)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+
+    qconfig = _quantization_config()
+    for onnx_file in sorted(export_dir.glob("*.onnx")):
+        print(f"Quantizing {onnx_file.name} (dynamic int8)")
+        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=onnx_file.name)
+        quantizer.quantize(save_dir=quant_dir, quantization_config=qconfig)
+
+    model.config.save_pretrained(quant_dir)
+    tokenizer.save_pretrained(quant_dir)
+    return quant_dir
+
+
+def load_quantized_qa(model_name: str):
+    """
+    (tokenizer, ORTModelForQuestionAnswering) running the int8 graph on CPU.
+    """
+    _require_optimum()
+    from optimum.onnxruntime import ORTModelForQuestionAnswering
+    from transformers import AutoTokenizer
+
+    quant_dir = _export_and_quantize(ORTModelForQuestionAnswering, model_name, "qa")
+    print(f"Loading quantized ONNX QA model from {quant_dir}")
+    model = ORTModelForQuestionAnswering.from_pretrained(
+        quant_dir, file_name="model_quantized.onnx"
+    )
+    return AutoTokenizer.from_pretrained(quant_dir), model
+
+
+def load_quantized_seq2seq(source: Union[str, Path]):
+    """
+    (tokenizer, ORTModelForSeq2SeqLM) with quantized encoder and decoder graphs.
+    """
+    _require_optimum()
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer
+
+    quant_dir = _export_and_quantize(ORTModelForSeq2SeqLM, source, "seq2seq")
+    print(f"Loading quantized ONNX seq2seq model from {quant_dir}")
+
+    files = {
+        "encoder_file_name": "encoder_model_quantized.onnx",
+        "decoder_file_name": "decoder_model_quantized.onnx",
+    }
+    if (quant_dir / "decoder_with_past_model_quantized.onnx").exists():
+        files["decoder_with_past_file_name"] = "decoder_with_past_model_quantized.onnx"
+    else:
+        files["use_cache"] = False
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(quant_dir, **files)
+    return AutoTokenizer.from_pretrained(quant_dir), model
@@ -0,0 +1,145 @@
+# src/pdf_extract.py
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, List
+
+from .config import (
+    PDF_MAX_UPLOAD_BYTES,
+    PDF_MAX_PAGES,
+    PDF_EXTRACT_WORKERS,
+    PDF_PAGES_PER_TASK,
+)
+
+# Large PDFs are never held in memory as a whole and never parsed on the
+# event loop: uploads are spooled to disk, and pages are extracted in a
+# process pool a few pages per task.
+
+PAGE_SEPARATOR = "\n\n"
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+class PdfLimitError(ValueError):
+    """
+    Upload exceeds PDF_MAX_UPLOAD_BYTES or PDF_MAX_PAGES.
+    `status_code` is the HTTP status the API should return.
+    """
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@lru_cache(maxsize=1)
+def _get_pool() -> ProcessPoolExecutor:
+    # spawn: don't fork a process that already holds torch / model threads
+    return ProcessPoolExecutor(
+        max_workers=PDF_EXTRACT_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# ---- worker-side functions (run in the process pool) ----
+
+def _count_pages(path: str) -> int:
+    from PyPDF2 import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def _extract_pages(path: str, start: int, end: int) -> List[str]:
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    return [(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+# ---- event-loop side ----
+
+async def spool_upload(upload, max_bytes: int = PDF_MAX_UPLOAD_BYTES) -> Path:
+    """
+    Copy an upload (anything with `async read(n)`) to a temp file in
+    fixed-size chunks. Raises PdfLimitError (413) past `max_bytes`.
+    File writes run on a worker thread, off the event loop.
+    The caller owns the returned file and must delete it.
+    """
+    fd, name = await asyncio.to_thread(tempfile.mkstemp, suffix=".pdf")
+    path = Path(name)
+    total = 0
+    try:
+        f = os.fdopen(fd, "wb")
+        try:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                total += len(chunk)
+                if total > max_bytes:
+                    raise PdfLimitError(
+                        f"PDF is larger than the {max_bytes // (1024 * 1024)} MB upload limit.",
+                        status_code=413,
+                    )
+                await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+async def iter_pages(path: Path, max_pages: int = PDF_MAX_PAGES) -> AsyncIterator[dict]:
+    """
+    Extract pages in parallel and yield them in page order:
+        {"page": i, "start": int, "end": int, "text": str}
+    start/end are character offsets of the page within the full text,
+    where pages are joined with PAGE_SEPARATOR.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+
+    num_pages = await loop.run_in_executor(pool, _count_pages, str(path))
+    if num_pages > max_pages:
+        raise PdfLimitError(
+            f"PDF has {num_pages} pages; the limit is {max_pages}.",
+            status_code=422,
+        )
+
+    # Submit every page range up front so workers run ahead of the consumer
+    tasks = [
+        loop.run_in_executor(pool, _extract_pages, str(path), start, min(start + PDF_PAGES_PER_TASK, num_pages))
+        for start in range(0, num_pages, PDF_PAGES_PER_TASK)
+    ]
+
+    offset = 0
+    page = 0
+    try:
+        for task in tasks:
+            for text in await task:
+                if page > 0:
+                    offset += len(PAGE_SEPARATOR)
+                yield {"page": page, "start": offset, "end": offset + len(text), "text": text}
+                offset += len(text)
+                page += 1
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def extract_pdf_text(path: Path, max_pages: int = PDF_MAX_PAGES) -> dict:
+    """
+    Full text of a PDF plus per-page character offsets.
+    """
+    parts = []
+    pages = []
+    async for page in iter_pages(path, max_pages=max_pages):
+        parts.append(page["text"])
+        pages.append({"page": page["page"], "start": page["start"], "end": page["end"]})
+    return {"text": PAGE_SEPARATOR.join(parts), "pages": pages}
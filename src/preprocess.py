@@ -1,5 +1,5 @@
 # src/preprocess.py
-from typing import Optional
+from typing import Iterator, Optional
 
 from datasets import load_dataset
 
@@ -30,6 +30,17 @@ def load_billsum(split: str = BILLSUM_SPLIT,
     return ds
 
 
+def iter_billsum(split: str = BILLSUM_SPLIT) -> Iterator[dict]:
+    """
+    Stream BillSum records one at a time instead of loading the whole split.
+    Each record has fields: "text", "summary", "title".
+    """
+    print(f"Streaming BillSum dataset with split='{split}' ...")
+    ds = load_dataset("billsum", split=split, streaming=True)
+    for record in ds:
+        yield record
+
+
 def clean_text(text: str) -> str:
     """
     Very light cleaning step for now.
@@ -1,14 +1,31 @@
 # src/qa.py
 
+from __future__ import annotations
+
+import math
 from functools import lru_cache
+from typing import TYPE_CHECKING, List
 
-import torch
-from transformers import AutoTokenizer, AutoModelForQuestionAnswering
+# torch / transformers are imported on first use so importing this module
+# (e.g. at API startup) stays cheap
+if TYPE_CHECKING:
+    import torch
 
-from .config import QA_MODEL_NAME, QA_MAX_CONTEXT_LENGTH
+from .config import (
+    QA_MODEL_NAME,
+    QA_MAX_CONTEXT_LENGTH,
+    QA_DOC_STRIDE,
+    QA_BATCH_SIZE,
+    QA_MAX_ANSWER_LENGTH,
+    QA_N_BEST,
+    INFERENCE_BACKEND,
+)
+from .metrics import observe, timed
 
 
 def _get_device() -> torch.device:
+    import torch
+
     if torch.backends.mps.is_available():
         print("QA: Using Apple MPS device")
         return torch.device("mps")
@@ -23,67 +40,211 @@ def _get_device() -> torch.device:
 def load_qa_model_and_tokenizer():
     """
     Load QA model + tokenizer once and cache them.
+    With INFERENCE_BACKEND="onnx", the model is an int8 ONNX Runtime model on CPU.
     """
+    from transformers import AutoTokenizer, AutoModelForQuestionAnswering
+
     print(f"Loading QA model: {QA_MODEL_NAME}")
-    tokenizer = AutoTokenizer.from_pretrained(QA_MODEL_NAME)
-    model = AutoModelForQuestionAnswering.from_pretrained(QA_MODEL_NAME)
+    with timed("model_load_seconds", {"model": "qa"}):
+        if INFERENCE_BACKEND == "onnx":
+            import torch
+            from .onnx_backend import load_quantized_qa
+
+            tokenizer, model = load_quantized_qa(QA_MODEL_NAME)
+            return tokenizer, model, torch.device("cpu")
+
+        tokenizer = AutoTokenizer.from_pretrained(QA_MODEL_NAME)
+        model = AutoModelForQuestionAnswering.from_pretrained(QA_MODEL_NAME)
 
-    device = _get_device()
-    model.to(device)
-    model.eval()
+        device = _get_device()
+        model.to(device)
+        model.eval()
     return tokenizer, model, device
 
 
-def answer_question(question: str, context: str) -> dict:
+def _encode_windows(questions: List[str], context: str):
+    """
+    Tokenize every question + context pair into overlapping windows, in one
+    tokenizer call. Each window holds the full question and a
+    QA_MAX_CONTEXT_LENGTH slice of the context; consecutive windows overlap by
+    QA_DOC_STRIDE tokens. `overflow_to_sample_mapping` gives each window's
+    question index.
+    """
+    tokenizer, _, _ = load_qa_model_and_tokenizer()
+    return tokenizer(
+        questions,
+        [context] * len(questions),
+        truncation="only_second",
+        max_length=QA_MAX_CONTEXT_LENGTH,
+        stride=QA_DOC_STRIDE,
+        return_overflowing_tokens=True,
+        return_offsets_mapping=True,
+        padding="longest",
+        return_tensors="pt",
+    )
+
+
+def _context_mask(encoded) -> torch.Tensor:
+    """
+    Boolean mask (num_windows, seq_len) that is True only on context tokens.
+    """
+    import torch
+
+    num_windows = encoded["input_ids"].shape[0]
+    return torch.tensor(
+        [[sid == 1 for sid in encoded.sequence_ids(i)] for i in range(num_windows)],
+        dtype=torch.bool,
+    )
+
+
+def _run_windows(encoded):
+    """
+    Run all windows through the QA model in batches of QA_BATCH_SIZE.
+    Yields (window_offset, start_logits, end_logits) per batch, on CPU.
+    """
+    import torch
+
+    _, model, device = load_qa_model_and_tokenizer()
+    model_inputs = {
+        k: v
+        for k, v in encoded.items()
+        if k not in ("offset_mapping", "overflow_to_sample_mapping")
+    }
+    num_windows = encoded["input_ids"].shape[0]
+
+    for b in range(0, num_windows, QA_BATCH_SIZE):
+        batch = {k: v[b : b + QA_BATCH_SIZE].to(device) for k, v in model_inputs.items()}
+        observe("qa_input_tokens", int(batch["attention_mask"].sum()))
+        with timed("qa_forward_seconds"), torch.no_grad():
+            outputs = model(**batch)
+        yield b, outputs.start_logits.float().cpu(), outputs.end_logits.float().cpu()
+
+
+def _top_spans(
+    start_logits: torch.Tensor,
+    end_logits: torch.Tensor,
+    context_mask: torch.Tensor,
+    max_answer_length: int,
+    n_best: int,
+):
+    """
+    Vectorized span search over a batch of windows.
+
+    Scores every (start, end) pair with start <= end < start + max_answer_length
+    inside the context, and returns the n_best pairs per window as
+    (scores, starts, ends), each of shape (num_windows, k).
+    Scores are log-probabilities: log p(start) + log p(end).
+    """
+    import torch
+
+    very_negative = torch.finfo(start_logits.dtype).min
+    start_lp = torch.log_softmax(start_logits.masked_fill(~context_mask, very_negative), dim=-1)
+    end_lp = torch.log_softmax(end_logits.masked_fill(~context_mask, very_negative), dim=-1)
+
+    # Invalid positions get -inf so they can never be selected
+    start_lp = start_lp.masked_fill(~context_mask, float("-inf"))
+    end_lp = end_lp.masked_fill(~context_mask, float("-inf"))
+
+    # band[w, i, m] = end_lp[w, i + m]  ->  pairs (i, i + m) for m < max_answer_length
+    num_windows, seq_len = start_lp.shape
+    padded_end = torch.nn.functional.pad(end_lp, (0, max_answer_length - 1), value=float("-inf"))
+    band = padded_end.unfold(-1, max_answer_length, 1)  # (W, L, M)
+
+    pair_scores = start_lp.unsqueeze(-1) + band  # (W, L, M)
+    flat = pair_scores.reshape(num_windows, -1)
+    k = min(n_best, flat.shape[1])
+    top_scores, top_idx = flat.topk(k, dim=-1)
+
+    starts = top_idx // max_answer_length
+    ends = starts + top_idx % max_answer_length
+    return top_scores, starts, ends
+
+
+def _empty_answer() -> dict:
+    return {"answer": "", "score": 0.0, "start": 0, "end": 0, "n_best": []}
+
+
+def answer_questions(
+    questions: List[str],
+    context: str,
+    max_answer_length: int = QA_MAX_ANSWER_LENGTH,
+    n_best: int = QA_N_BEST,
+) -> List[dict]:
+    """
+    Answer many questions about one context.
+
+    All question x window pairs are tokenized in one call and run through
+    the model in shared batches of QA_BATCH_SIZE windows, instead of one
+    tokenize + forward loop per question. Returns one answer dict (same
+    shape as answer_question) per question, in order.
+    """
+    results = [_empty_answer() for _ in questions]
+    asked = [i for i, q in enumerate(questions) if q.strip()]
+    if not context.strip() or not asked:
+        return results
+
+    with timed("qa_tokenize_seconds"):
+        encoded = _encode_windows([questions[i] for i in asked], context)
+    observe("qa_windows", encoded["input_ids"].shape[0])
+    offsets = encoded["offset_mapping"]
+    window_question = encoded["overflow_to_sample_mapping"].tolist()
+    context_mask = _context_mask(encoded)
+
+    # candidates[q] = {(start_char, end_char): best log-prob score}
+    candidates = [{} for _ in asked]
+    for b, start_logits, end_logits in _run_windows(encoded):
+        window_mask = context_mask[b : b + start_logits.shape[0]]
+        scores, starts, ends = _top_spans(
+            start_logits, end_logits, window_mask, max_answer_length, n_best
+        )
+        for w in range(scores.shape[0]):
+            found = candidates[window_question[b + w]]
+            for score, s, e in zip(scores[w].tolist(), starts[w].tolist(), ends[w].tolist()):
+                if score == float("-inf"):
+                    continue
+                start_char = int(offsets[b + w, s, 0])
+                end_char = int(offsets[b + w, e, 1])
+                # Overlapping windows can propose the same span: keep the best score
+                key = (start_char, end_char)
+                if key not in found or score > found[key]:
+                    found[key] = score
+
+    for i, found in zip(asked, candidates):
+        if not found:
+            continue
+        ranked = sorted(found.items(), key=lambda item: item[1], reverse=True)[:n_best]
+        n_best_answers = [
+            {
+                "answer": context[start_char:end_char].strip(),
+                "score": float(math.exp(score)),
+                "start": start_char,
+                "end": end_char,
+            }
+            for (start_char, end_char), score in ranked
+        ]
+        results[i] = {**n_best_answers[0], "n_best": n_best_answers}
+    return results
+
+
+def answer_question(
+    question: str,
+    context: str,
+    max_answer_length: int = QA_MAX_ANSWER_LENGTH,
+    n_best: int = QA_N_BEST,
+) -> dict:
     """
     Given a question and a context (legal/policy text), return the best answer span.
 
+    Long contexts are handled with a sliding window, so answers anywhere in
+    the document can be found. start/end are character offsets into `context`.
+
     Returns:
         {
             "answer": str,
             "score": float,
             "start": int,
-            "end": int
+            "end": int,
+            "n_best": [{"answer", "score", "start", "end"}, ...]
         }
     """
-    tokenizer, model, device = load_qa_model_and_tokenizer()
-
-    # Truncate context if it's too long for the QA model
-    # (we can later upgrade to sliding window over long docs)
-    encoded = tokenizer(
-        question,
-        context,
-        truncation=True,
-        max_length=QA_MAX_CONTEXT_LENGTH,
-        return_tensors="pt",
-    ).to(device)
-
-    with torch.no_grad():
-        outputs = model(**encoded)
-        start_logits = outputs.start_logits
-        end_logits = outputs.end_logits
-
-    # Get the most likely beginning and end of the answer span
-    start_idx = int(torch.argmax(start_logits, dim=-1)[0])
-    end_idx = int(torch.argmax(end_logits, dim=-1)[0])
-
-    # Ensure end_idx >= start_idx
-    if end_idx < start_idx:
-        end_idx = start_idx
-
-    # Convert token indices back to string
-    all_tokens = tokenizer.convert_ids_to_tokens(encoded["input_ids"][0])
-    answer_tokens = all_tokens[start_idx : end_idx + 1]
-    answer = tokenizer.convert_tokens_to_string(answer_tokens).strip()
-
-    # Compute a simple confidence score (not perfect, but okay for now)
-    start_score = torch.max(torch.softmax(start_logits, dim=-1)).item()
-    end_score = torch.max(torch.softmax(end_logits, dim=-1)).item()
-    score = float((start_score + end_score) / 2.0)
-
-    return {
-        "answer": answer,
-        "score": score,
-        "start": start_idx,
-        "end": end_idx,
-    }
+    return answer_questions([question], context, max_answer_length, n_best)[0]
@@ -2,33 +2,126 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple, Union
 
 import numpy as np
-import nltk
-from nltk.tokenize import sent_tokenize
-from sentence_transformers import SentenceTransformer
 
-from .groq_qa import answer_question_groq, summarize_with_groq
+from .bm25 import BM25Index, is_keyword_query
+from .batcher import MicroBatcher
+from .config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_WAIT_MS,
+    EMBEDDING_MODEL_NAME,
+    RAG_CHUNKER,
+    RAG_CONTEXT_TOKEN_BUDGET,
+    RAG_DENSE_WEIGHT,
+    RAG_LEXICAL_FAST_PATH,
+    RAG_RETRIEVAL_MODE,
+)
+from .context_packer import pack_spans
+from .embedding_cache import embedding_key, get_embedding_cache
+from .legal_chunker import legal_chunk_spans
+from .metrics import observe, timed
+from .single_flight import flight_key, get_single_flight
+from .groq_qa import (
+    GROQ_MAX_CONCURRENCY,
+    answer_question_groq,
+    answer_question_groq_async,
+    summarize_with_groq,
+    summarize_with_groq_async,
+    stream_answer_question_groq,
+    stream_summarize_with_groq,
+)
 
 # Long text → chunk → embed → choose top relevant chunks → send only those to Groq → answer.
+# Chunks are chosen by score until the prompt token budget is used up (see context_packer).
 
-# Ensure punkt is available for sentence splitting
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt")
+
+@lru_cache(maxsize=1)
+def _ensure_punkt() -> None:
+    """
+    Ensure punkt is available for sentence splitting (checked on first use,
+    not at import time).
+    """
+    import nltk
+
+    try:
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        nltk.download("punkt")
+
+
+def sent_tokenize(text: str) -> List[str]:
+    """
+    NLTK punkt sentence splitting (nltk is imported on first use).
+    """
+    from nltk.tokenize import sent_tokenize as _punkt_sent_tokenize
+
+    _ensure_punkt()
+    return _punkt_sent_tokenize(text)
 
 
 @lru_cache(maxsize=1)
-def load_embedder() -> SentenceTransformer:
+def load_embedder():
     """
     Load a sentence-transformer model once and cache it.
     """
-    model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    print(f"Loading embedding model: {model_name}")
-    return SentenceTransformer(model_name)
+    from sentence_transformers import SentenceTransformer
+
+    print(f"Loading embedding model: {EMBEDDING_MODEL_NAME}")
+    with timed("model_load_seconds", {"model": "embedder"}):
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+def _encode_batch(texts: List[str]) -> List[np.ndarray]:
+    """
+    Encode one micro-batch on the batcher thread. Texts are sorted by length
+    (longest first) so each encode batch pads to similar lengths; results
+    are returned in the original order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    observe("rag_embed_batch_size", len(texts))
+    with timed("rag_embed_batch_seconds"):
+        vectors = load_embedder().encode(
+            [texts[i] for i in order],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+    results: List[np.ndarray] = [None] * len(texts)
+    for row, i in enumerate(order):
+        # Copy rows so each vector owns its memory (not a view of the batch)
+        results[i] = np.array(vectors[row])
+    return results
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> MicroBatcher:
+    """
+    Process-wide batcher in front of the sentence-transformer: chunk and
+    query texts from concurrent requests share encode calls.
+    """
+    return MicroBatcher(
+        _encode_batch,
+        max_batch_size=EMBEDDING_BATCH_SIZE,
+        max_wait_ms=EMBEDDING_BATCH_WAIT_MS,
+        name="embedding-batcher",
+    )
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Normalized embeddings for `texts`, shape (len(texts), dim), computed
+    through the shared embedding batcher.
+    """
+    batcher = get_embedding_batcher()
+    futures = [batcher.submit(text) for text in texts]
+    return np.stack([future.result() for future in futures])
 
 
 def chunk_text(
@@ -43,7 +136,8 @@ def chunk_text(
         [s1, s2, s3, s4, s5, s6] with max_sentences_per_chunk=3, overlap=1
         -> [s1 s2 s3], [s3 s4 s5], [s5 s6]
     """
-    sentences = sent_tokenize(text)
+    with timed("rag_sentence_tokenize_seconds"):
+        sentences = sent_tokenize(text)
     chunks = []
     i = 0
     while i < len(sentences):
@@ -57,97 +151,591 @@ def chunk_text(
     return chunks
 
 
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) character offsets of each punkt sentence in `text`.
+    """
+    spans = []
+    pos = 0
+    with timed("rag_sentence_tokenize_seconds"):
+        sentences = sent_tokenize(text)
+    for sentence in sentences:
+        start = text.find(sentence, pos)
+        if start == -1:  # punkt normalized something; fall back to the running position
+            start = pos
+        end = min(len(text), start + len(sentence))
+        spans.append((start, end))
+        pos = end
+    return spans
+
+
+def chunk_spans(
+    text: str,
+    max_sentences_per_chunk: int = 5,
+    overlap: int = 1,
+) -> List[Tuple[int, int]]:
+    """
+    Same windows as chunk_text, returned as (start, end) character offsets
+    into `text` instead of copied strings.
+    """
+    sentence_spans = _sentence_spans(text)
+    spans = []
+    i = 0
+    while i < len(sentence_spans):
+        window = sentence_spans[i : i + max_sentences_per_chunk]
+        start, end = window[0][0], window[-1][1]
+        if text[start:end].strip():
+            spans.append((start, end))
+        i += max_sentences_per_chunk - overlap
+        if max_sentences_per_chunk == overlap:  # avoid infinite loop
+            break
+    return spans
+
+
+def document_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Chunk offsets used for retrieval: legal structure (default) or punkt
+    sentence windows, depending on RAG_CHUNKER.
+    """
+    if RAG_CHUNKER == "punkt":
+        return chunk_spans(text)
+    with timed("rag_chunk_seconds"):
+        return legal_chunk_spans(text)
+
+
 def build_index(chunks: List[str]) -> Tuple[List[str], np.ndarray]:
     """
     Build an in-memory 'index':
       - chunk_texts: the original text chunks
       - embeddings: 2D numpy array of shape (num_chunks, dim)
     """
-    embedder = load_embedder()
-    embeddings = embedder.encode(chunks, convert_to_numpy=True, normalize_embeddings=True)
+    observe("rag_chunks", len(chunks))
+    embeddings = embed_chunks(chunks)
     return chunks, embeddings
 
 
+def build_sparse_index(chunks: List[str]) -> BM25Index:
+    """
+    BM25 index over the same chunks, built alongside build_index.
+    """
+    with timed("rag_bm25_build_seconds"):
+        return BM25Index.build(chunks)
+
+
+def embed_chunks(chunks: List[str]) -> np.ndarray:
+    """
+    Embed chunks, reusing cached vectors where possible.
+    Only chunks never seen before (for this embedder) go through encode().
+    """
+    if not chunks:
+        dim = load_embedder().get_sentence_embedding_dimension()
+        return np.zeros((0, dim), dtype=np.float32)
+
+    cache = get_embedding_cache()
+    keys = [embedding_key(chunk, EMBEDDING_MODEL_NAME) for chunk in chunks]
+    found = cache.get_many(keys)
+
+    # Encode each distinct missing chunk once, through the shared batcher
+    missing = {}
+    for key, chunk in zip(keys, chunks):
+        if key not in found and key not in missing:
+            missing[key] = chunk
+
+    if missing:
+        with timed("rag_embed_seconds"):
+            new_embeddings = embed_texts(list(missing.values()))
+        new_items = dict(zip(missing.keys(), new_embeddings))
+        cache.put_many(new_items)
+        found.update(new_items)
+
+    return np.stack([found[key] for key in keys])
+
+
+def embedding_cache_stats() -> dict:
+    """
+    Hit/miss counters for the chunk-embedding cache.
+    """
+    return get_embedding_cache().stats()
+
+
+def score_chunks(
+    query: str,
+    embeddings: np.ndarray,
+    query_embedding: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Cosine similarity of every chunk embedding to the query, shape (num_chunks,).
+    Pass `query_embedding` if the query was already embedded.
+    """
+    if query_embedding is None:
+        with timed("rag_query_embed_seconds"):
+            query_embedding = embed_texts([query])[0]
+
+    with timed("rag_retrieve_seconds"):
+        # Cosine similarity since vectors are normalized: dot product
+        return embeddings @ query_embedding
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first. argpartition selects them
+    in O(n); only those k are sorted.
+    """
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _lexical_scores(query: str, bm25: BM25Index) -> Tuple[np.ndarray, float]:
+    with timed("rag_bm25_seconds"):
+        lexical = bm25.score(query)
+    return lexical, float(lexical.max()) if lexical.size else 0.0
+
+
+def _uses_lexical_fast_path(query: str, bm25: Optional[BM25Index]) -> bool:
+    """
+    True if hybrid_scores ranks `query` by BM25 alone (no embeddings needed).
+    """
+    if bm25 is None or RAG_RETRIEVAL_MODE == "dense" or not RAG_LEXICAL_FAST_PATH:
+        return False
+    return is_keyword_query(query) and _lexical_scores(query, bm25)[1] > 0
+
+
+def hybrid_scores(
+    query: str,
+    embeddings: Union[np.ndarray, Callable[[], np.ndarray]],
+    bm25: Optional[BM25Index] = None,
+    query_embedding: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Chunk scores for a query (`query_embedding`, if given, is used instead
+    of embedding the query). `embeddings` may be a callable returning the
+    chunk embeddings; it is only called if dense scores are needed.
+
+    - Dense only when there is no BM25 index (or RAG_RETRIEVAL_MODE="dense").
+    - Lexical fast path: keyword-driven queries (section numbers, dollar
+      amounts, quoted terms) that match the index are ranked by BM25 alone,
+      without embedding the query or the chunks.
+    - Otherwise cosine similarity and BM25 (scaled to [0, 1]) are fused with
+      weight RAG_DENSE_WEIGHT on the dense side.
+    """
+    lexical, best_lexical = None, 0.0
+    if bm25 is not None and RAG_RETRIEVAL_MODE != "dense":
+        lexical, best_lexical = _lexical_scores(query, bm25)
+        if RAG_LEXICAL_FAST_PATH and best_lexical > 0 and is_keyword_query(query):
+            return lexical
+
+    if callable(embeddings):
+        embeddings = embeddings()
+    dense = score_chunks(query, embeddings, query_embedding)
+    if best_lexical <= 0:
+        return dense
+    return RAG_DENSE_WEIGHT * dense + (1.0 - RAG_DENSE_WEIGHT) * (lexical / best_lexical)
+
+
 def retrieve_top_k(
     question: str,
     chunk_texts: List[str],
     embeddings: np.ndarray,
     top_k: int = 3,
+    bm25: Optional[BM25Index] = None,
 ) -> List[str]:
     """
-    Retrieve top-k most relevant chunks for a question using cosine similarity.
+    Retrieve top-k most relevant chunks for a question: cosine similarity,
+    fused with BM25 if a sparse index is given.
+    """
+    scores = hybrid_scores(question, embeddings, bm25)
+    return [chunk_texts[i] for i in top_k_indices(scores, top_k)]
+
+
+# Generic query representing "summary of the document"
+SUMMARY_QUERY = (
+    "What are the main obligations, rights, and key points described "
+    "in this legal or policy text?"
+)
+
+
+def _index_text(full_text: str, document=None):
+    """
+    (text, spans, chunk embeddings, BM25 index) for a raw text, or the stored
+    index of a registered document. Embeddings and BM25 are None if the text
+    has no usable chunks.
+
+    For a raw text the embeddings are returned as a memoized callable: the
+    BM25 index is built first, and the chunks are only embedded if a query
+    needs dense scores (see hybrid_scores).
     """
-    embedder = load_embedder()
-    q_emb = embedder.encode([question], convert_to_numpy=True, normalize_embeddings=True)[0]
+    if document is not None:
+        return document.text, document.spans.tolist(), document.embeddings, document.bm25
+
+    spans = document_spans(full_text)
+    if not spans:
+        return full_text, spans, None, None
+    chunks = [full_text[start:end] for start, end in spans]
+    bm25 = build_sparse_index(chunks)
+    embeddings = lru_cache(maxsize=1)(lambda: build_index(chunks)[1])
+    return full_text, spans, embeddings, bm25
+
 
-    # Cosine similarity since vectors are normalized: dot product
-    scores = embeddings @ q_emb  # shape: (num_chunks,)
-    top_indices = np.argsort(scores)[::-1][:top_k]
+def _pack_context(
+    text: str,
+    spans: List[Tuple[int, int]],
+    scores: np.ndarray,
+    top_k: Optional[int],
+    token_budget: Optional[int],
+) -> Tuple[List[str], str]:
+    chosen, context = pack_spans(
+        text,
+        spans,
+        scores,
+        token_budget=token_budget or RAG_CONTEXT_TOKEN_BUDGET,
+        max_chunks=top_k,
+    )
+    return [text[spans[i][0]:spans[i][1]] for i in chosen], context
 
-    return [chunk_texts[i] for i in top_indices]
 
+def _retrieve_context(
+    query: str,
+    full_text: str,
+    top_k: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    document=None,
+) -> Tuple[List[str], str]:
+    """
+    Chunk + index the full text, score the chunks against the query and pack
+    the best ones into a context of at most `token_budget` tokens
+    (RAG_CONTEXT_TOKEN_BUDGET by default), optionally capped at `top_k` chunks.
+    If a registered document is given, its stored index is used instead.
 
-def answer_question_rag(question: str, full_context: str, top_k: int = 3) -> dict:
+    Returns (chosen chunk texts, best first; packed context), or ([], "")
+    if the text has no usable sentences.
+    """
+    text, spans, embeddings, bm25 = _index_text(full_text, document)
+    if not spans:
+        return [], ""
+
+    scores = hybrid_scores(query, embeddings, bm25)
+    return _pack_context(text, spans, scores, top_k, token_budget)
+
+
+def _retrieve_contexts(
+    queries: List[str],
+    full_text: str,
+    top_k: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    document=None,
+) -> List[Tuple[List[str], str]]:
+    """
+    _retrieve_context for many queries against one text: the text is chunked
+    and indexed once, and all queries are embedded together.
+    """
+    text, spans, embeddings, bm25 = _index_text(full_text, document)
+    if not spans:
+        return [([], "") for _ in queries]
+
+    # Queries on the lexical fast path need no embedding
+    dense_queries = [q for q in dict.fromkeys(queries) if not _uses_lexical_fast_path(q, bm25)]
+    query_embeddings = {}
+    if dense_queries:
+        with timed("rag_query_embed_seconds"):
+            query_embeddings = dict(zip(dense_queries, embed_texts(dense_queries)))
+    return [
+        _pack_context(
+            text,
+            spans,
+            hybrid_scores(query, embeddings, bm25, query_embeddings.get(query)),
+            top_k,
+            token_budget,
+        )
+        for query in queries
+    ]
+
+
+def _rag_flight_key(query, full_text, top_k, token_budget, use_cache, document) -> str:
+    """
+    Single-flight key for a RAG call; registered documents are keyed by
+    doc_id (a content hash), raw text by the text itself.
+    """
+    source = document.doc_id if document is not None else full_text
+    return flight_key(query, source, top_k, token_budget, use_cache)
+
+
+def answer_question_rag(
+    question: str,
+    full_context: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+) -> dict:
     """
     End-to-end RAG-style QA:
       1. Chunk the full context into sentence windows.
       2. Embed all chunks and the question.
-      3. Retrieve top-k chunks.
-      4. Concatenate these chunks into a focused context.
+      3. Rank chunks by similarity.
+      4. Pack the best chunks into a focused context within the token budget.
       5. Ask Groq LLM (Llama3) to answer using only that focused context.
+    Concurrent identical calls share one run.
     """
-    # 1–2. Build index
-    chunks = chunk_text(full_context)
-    if not chunks:
+    def _run() -> dict:
+        # 1–4. Build index, rank chunks and pack the best into the token budget
+        top_chunks, focused_context = _retrieve_context(
+            question, full_context, top_k, token_budget, document
+        )
+        if not top_chunks:
+            return {
+                "answer": "No usable text found in the context.",
+                "retrieved_chunks": [],
+            }
+
+        # 5. Ask Groq using the focused context
+        answer = answer_question_groq(
+            question=question,
+            context=focused_context,
+            use_cache=use_cache,
+        )
+
+        return {
+            "answer": answer,
+            "retrieved_chunks": top_chunks,
+        }
+
+    key = _rag_flight_key(question, full_context, top_k, token_budget, use_cache, document)
+    return get_single_flight("answer_question_rag").do(key, _run)
+
+
+async def answer_question_rag_async(
+    question: str,
+    full_context: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+) -> dict:
+    """
+    Async version of answer_question_rag.
+    Embedding runs in a worker thread; the Groq call uses the pooled async client.
+    """
+    async def _run() -> dict:
+        top_chunks, focused_context = await asyncio.to_thread(
+            _retrieve_context, question, full_context, top_k, token_budget, document
+        )
+        if not top_chunks:
+            return {
+                "answer": "No usable text found in the context.",
+                "retrieved_chunks": [],
+            }
+
+        result = await answer_question_groq_async(
+            question=question,
+            context=focused_context,
+            use_cache=use_cache,
+        )
+
         return {
-            "answer": "No usable text found in the context.",
-            "retrieved_chunks": [],
+            "answer": result["answer"],
+            "retrieved_chunks": top_chunks,
+            "cache": result["cache"],
         }
 
-    chunk_texts, embeddings = build_index(chunks)
+    key = _rag_flight_key(question, full_context, top_k, token_budget, use_cache, document)
+    return await get_single_flight("answer_question_rag").do_async(key, _run)
+
+
+def answer_questions_rag(
+    questions: List[str],
+    full_context: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+) -> List[dict]:
+    """
+    answer_question_rag for a list of questions about one document.
+    The document is chunked and embedded once, the questions are embedded
+    together, and the Groq calls run concurrently (up to GROQ_MAX_CONCURRENCY).
+    """
+    if not questions:
+        return []
+    retrieved = _retrieve_contexts(questions, full_context, top_k, token_budget, document)
+
+    def _answer(question: str, top_chunks: List[str], focused_context: str) -> dict:
+        if not top_chunks:
+            return {
+                "answer": "No usable text found in the context.",
+                "retrieved_chunks": [],
+            }
+        answer = answer_question_groq(
+            question=question,
+            context=focused_context,
+            use_cache=use_cache,
+        )
+        return {"answer": answer, "retrieved_chunks": top_chunks}
+
+    with ThreadPoolExecutor(max_workers=min(len(questions), GROQ_MAX_CONCURRENCY)) as pool:
+        futures = [
+            # Copy the caller's context so Groq priority and metrics carry over
+            pool.submit(contextvars.copy_context().run, _answer, question, top_chunks, focused_context)
+            for question, (top_chunks, focused_context) in zip(questions, retrieved)
+        ]
+        return [future.result() for future in futures]
+
 
-    # 3. Retrieve top-k relevant chunks
-    top_chunks = retrieve_top_k(question, chunk_texts, embeddings, top_k=top_k)
+async def answer_questions_rag_async(
+    questions: List[str],
+    full_context: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+) -> List[dict]:
+    """
+    Async version of answer_questions_rag: retrieval runs in a worker thread,
+    then all Groq calls are sent together on the pooled async client.
+    """
+    if not questions:
+        return []
+    retrieved = await asyncio.to_thread(
+        _retrieve_contexts, questions, full_context, top_k, token_budget, document
+    )
 
-    # 4. Concatenate into a smaller context for Groq
-    focused_context = "\n\n".join(top_chunks)
+    async def _answer(question: str, top_chunks: List[str], focused_context: str) -> dict:
+        if not top_chunks:
+            return {
+                "answer": "No usable text found in the context.",
+                "retrieved_chunks": [],
+            }
+        result = await answer_question_groq_async(
+            question=question,
+            context=focused_context,
+            use_cache=use_cache,
+        )
+        return {
+            "answer": result["answer"],
+            "retrieved_chunks": top_chunks,
+            "cache": result["cache"],
+        }
 
-    # 5. Ask Groq using the focused context
-    answer = answer_question_groq(question=question, context=focused_context)
+    return list(
+        await asyncio.gather(
+            *(
+                _answer(question, top_chunks, focused_context)
+                for question, (top_chunks, focused_context) in zip(questions, retrieved)
+            )
+        )
+    )
 
-    return {
-        "answer": answer,
-        "retrieved_chunks": top_chunks,
-    }
 
-def summarize_rag(full_text: str, top_k: int = 5) -> dict:
+def summarize_rag(
+    full_text: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+) -> dict:
     """
     RAG-style summarization:
       1. Chunk the full text.
-      2. Use a generic 'summary' query to retrieve top-k chunks.
+      2. Rank chunks against a generic 'summary' query and pack the best
+         into the token budget.
       3. Ask Groq to summarize only those chunks.
+    Concurrent identical calls share one run.
     """
-    chunks = chunk_text(full_text)
-    if not chunks:
+    def _run() -> dict:
+        top_chunks, focused_context = _retrieve_context(
+            SUMMARY_QUERY, full_text, top_k, token_budget, document
+        )
+        if not top_chunks:
+            return {
+                "summary": "No usable text found to summarize.",
+                "retrieved_chunks": [],
+            }
+
+        summary = summarize_with_groq(focused_context, use_cache=use_cache)
+
         return {
-            "summary": "No usable text found to summarize.",
-            "retrieved_chunks": [],
+            "summary": summary,
+            "retrieved_chunks": top_chunks,
         }
 
-    chunk_texts, embeddings = build_index(chunks)
+    key = _rag_flight_key(SUMMARY_QUERY, full_text, top_k, token_budget, use_cache, document)
+    return get_single_flight("summarize_rag").do(key, _run)
+
+
+async def summarize_rag_async(
+    full_text: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+) -> dict:
+    """
+    Async version of summarize_rag.
+    """
+    async def _run() -> dict:
+        top_chunks, focused_context = await asyncio.to_thread(
+            _retrieve_context, SUMMARY_QUERY, full_text, top_k, token_budget, document
+        )
+        if not top_chunks:
+            return {
+                "summary": "No usable text found to summarize.",
+                "retrieved_chunks": [],
+            }
+
+        result = await summarize_with_groq_async(focused_context, use_cache=use_cache)
+
+        return {
+            "summary": result["summary"],
+            "retrieved_chunks": top_chunks,
+            "cache": result["cache"],
+        }
 
-    # Generic query representing "summary of the document"
-    summary_query = (
-        "What are the main obligations, rights, and key points described "
-        "in this legal or policy text?"
+    key = _rag_flight_key(SUMMARY_QUERY, full_text, top_k, token_budget, use_cache, document)
+    return await get_single_flight("summarize_rag").do_async(key, _run)
+
+
+async def stream_answer_question_rag(
+    question: str,
+    full_context: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+):
+    """
+    Streaming RAG QA. Yields (event, data) pairs:
+      ("chunks", [retrieved chunk texts]) first, then ("token", str) pieces.
+    """
+    top_chunks, focused_context = await asyncio.to_thread(
+        _retrieve_context, question, full_context, top_k, token_budget, document
     )
+    yield "chunks", top_chunks
+    if not top_chunks:
+        yield "token", "No usable text found in the context."
+        return
 
-    top_chunks = retrieve_top_k(summary_query, chunk_texts, embeddings, top_k=top_k)
-    focused_context = "\n\n".join(top_chunks)
+    async for delta in stream_answer_question_groq(question, focused_context, use_cache=use_cache):
+        yield "token", delta
 
-    summary = summarize_with_groq(focused_context)
 
-    return {
-        "summary": summary,
-        "retrieved_chunks": top_chunks,
-    }
+async def stream_summarize_rag(
+    full_text: str,
+    top_k: Optional[int] = None,
+    use_cache: bool = True,
+    document=None,
+    token_budget: Optional[int] = None,
+):
+    """
+    Streaming RAG summarization. Yields ("chunks", [...]) then ("token", str) pieces.
+    """
+    top_chunks, focused_context = await asyncio.to_thread(
+        _retrieve_context, SUMMARY_QUERY, full_text, top_k, token_budget, document
+    )
+    yield "chunks", top_chunks
+    if not top_chunks:
+        yield "token", "No usable text found to summarize."
+        return
+
+    async for delta in stream_summarize_with_groq(focused_context, use_cache=use_cache):
+        yield "token", delta
@@ -0,0 +1,388 @@
+# src/rate_limiter.py
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Mapping, Optional
+
+from .config import (
+    GROQ_RATE_LIMIT_ENABLED,
+    GROQ_RATE_MAX_QUEUE,
+    GROQ_RATE_MAX_WAIT_SECONDS,
+    GROQ_RPM_LIMIT,
+    GROQ_TPM_LIMIT,
+)
+from .metrics import observe
+
+# Client-side scheduling for the Groq API: every call needs one request from
+# a requests-per-minute bucket and its estimated tokens from a
+# tokens-per-minute bucket. Calls wait in a priority queue for both; when the
+# queue is full or the wait would be too long they fail fast with
+# RateLimitExceeded instead of holding a worker thread.
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "groq_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def groq_priority(priority: int):
+    """
+    Run the Groq calls made inside this block (and in tasks / threads started
+    with a copy of its context) at `priority`.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+_grant_event: contextvars.ContextVar[Optional[asyncio.Event]] = contextvars.ContextVar(
+    "groq_grant_event", default=None
+)
+
+
+@contextmanager
+def notify_grant(event: asyncio.Event):
+    """
+    Set `event` when an async Groq call made inside this block (or in a task
+    started with a copy of its context) is let through by the limiter.
+    """
+    token = _grant_event.set(event)
+    try:
+        yield
+    finally:
+        _grant_event.reset(token)
+
+
+class RateLimitExceeded(RuntimeError):
+    """
+    The Groq budget is exhausted: the queue is full, the wait would exceed
+    GROQ_RATE_MAX_WAIT_SECONDS, or Groq kept answering 429.
+    `retry_after` is a suggested delay in seconds.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_SCALE = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds in a rate-limit header: plain seconds ("12") or Groq's
+    durations ("7.66s", "2m59.56s", "250ms").
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * DURATION_SCALE[unit] for n, unit in parts)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Holds up to `per_minute` units and refills continuously at
+    per_minute / 60 units per second. The level may go negative when a
+    single call needs more than the whole capacity.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        rate = self.capacity / 60.0
+        self.level = min(self.capacity, self.level + (now - self._updated) * rate)
+        self._updated = now
+
+    def deficit_seconds(self, amount: float) -> float:
+        """
+        Seconds until `amount` units are available (0 if they are now).
+        """
+        missing = amount - self.level
+        return missing * 60.0 / self.capacity if missing > 0 else 0.0
+
+    def wait_seconds(self, amount: float) -> float:
+        # A call bigger than the bucket goes once the bucket is full
+        return self.deficit_seconds(min(amount, self.capacity))
+
+
+class _Waiter:
+    """
+    One queued call. Sync callers block on an Event; async callers await a
+    Future on their event loop.
+    """
+
+    def __init__(self, tokens: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.tokens = tokens
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class GroqRateLimiter:
+    """
+    Requests-per-minute + tokens-per-minute scheduler shared by all Groq calls
+    of this process (sync and async).
+
+    Waiters are granted strictly in (priority, arrival) order: the head of the
+    queue goes as soon as both buckets can cover it, and nobody behind it
+    overtakes. There is no scheduler thread; each waiter re-checks the queue
+    when it wakes up after the head's expected wait.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_queue: int, max_wait: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._queue: list = []  # heap of (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+        self.granted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    # ---- scheduling (call with self._lock held) ----
+
+    def _refill(self, now: float) -> None:
+        self.requests.refill(now)
+        self.tokens.refill(now)
+
+    def _dispatch(self) -> float:
+        """
+        Grant waiters from the head of the queue while the buckets allow.
+        Returns the seconds until the current head can go.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        while self._queue:
+            _, _, waiter = self._queue[0]
+            delay = max(
+                self._paused_until - now,
+                self.requests.wait_seconds(1),
+                self.tokens.wait_seconds(waiter.tokens),
+            )
+            if delay > 0:
+                return delay
+            heapq.heappop(self._queue)
+            self.requests.level -= 1
+            self.tokens.level -= waiter.tokens
+            self.granted += 1
+            waiter.grant()
+        return self.max_wait
+
+    def _estimated_wait(self, tokens: int, priority: int, now: float) -> float:
+        # Everything queued at the same or a higher priority goes first
+        ahead = [w for p, _, w in self._queue if p <= priority]
+        return max(
+            self._paused_until - now,
+            self.requests.deficit_seconds(len(ahead) + 1),
+            self.tokens.deficit_seconds(sum(w.tokens for w in ahead) + min(tokens, self.tokens.capacity)),
+        )
+
+    def _admit(self, waiter: _Waiter, priority: int, max_wait: float) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                "Groq request queue is full",
+                retry_after=self._estimated_wait(waiter.tokens, priority, now),
+            )
+        wait = self._estimated_wait(waiter.tokens, priority, now)
+        if wait > max_wait:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                f"Groq rate limit: estimated wait {wait:.1f}s exceeds {max_wait:.1f}s",
+                retry_after=wait,
+            )
+        heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+
+    def _give_up(self, waiter: _Waiter) -> bool:
+        """
+        Remove a waiter whose time ran out. False if it was granted meanwhile.
+        """
+        if waiter.granted:
+            return False
+        self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+        heapq.heapify(self._queue)
+        self.timed_out += 1
+        self._dispatch()
+        return True
+
+    # ---- public API ----
+
+    def acquire(self, tokens: int, timeout: Optional[float] = None) -> None:
+        """
+        Block until one request and `tokens` tokens are available.
+        Raises RateLimitExceeded if they are not within the bounded wait.
+        """
+        max_wait = min(self.max_wait, timeout) if timeout is not None else self.max_wait
+        priority = _priority.get()
+        waiter = _Waiter(tokens)
+        start = time.monotonic()
+        with self._lock:
+            self._admit(waiter, priority, max_wait)
+            delay = self._dispatch()
+
+        while not waiter.granted:
+            remaining = start + max_wait - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    gave_up = self._give_up(waiter)
+                if gave_up:
+                    raise RateLimitExceeded("Groq rate limit: wait timed out", retry_after=delay)
+                break
+            waiter.event.wait(min(delay, remaining))
+            with self._lock:
+                delay = self._dispatch()
+        observe("groq_rate_wait_seconds", time.monotonic() - start)
+
+    async def acquire_async(self, tokens: int, timeout: Optional[float] = None) -> None:
+        """
+        Async version of acquire: waits on the event loop, not on a thread.
+        """
+        max_wait = min(self.max_wait, timeout) if timeout is not None else self.max_wait
+        priority = _priority.get()
+        waiter = _Waiter(tokens, asyncio.get_running_loop())
+        start = time.monotonic()
+        with self._lock:
+            self._admit(waiter, priority, max_wait)
+            delay = self._dispatch()
+
+        try:
+            while not waiter.granted:
+                remaining = start + max_wait - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        gave_up = self._give_up(waiter)
+                    if gave_up:
+                        raise RateLimitExceeded("Groq rate limit: wait timed out", retry_after=delay)
+                    break
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), min(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    delay = self._dispatch()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._give_up(waiter)
+            raise
+        observe("groq_rate_wait_seconds", time.monotonic() - start)
+        event = _grant_event.get()
+        if event is not None:
+            event.set()
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adjust the buckets to Groq's x-ratelimit-* response headers.
+
+        - limit-tokens is the account's TPM: it becomes the bucket capacity.
+        - remaining-tokens / remaining-requests lower our levels when Groq has
+          seen more usage than we counted (other clients on the same key).
+          They are never used to raise the levels, since calls granted after
+          this response are not reflected in it.
+        - limit-requests is requests per *day* on Groq, so it does not change
+          the RPM capacity; when the remaining count reaches 0 we pause until
+          reset-requests.
+        """
+        limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit_tokens:
+                self.tokens.capacity = limit_tokens
+            if remaining_tokens is not None:
+                self.tokens.level = min(self.tokens.level, remaining_tokens)
+            if remaining_requests is not None:
+                self.requests.level = min(self.requests.level, remaining_requests)
+        if remaining_requests == 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.pause(reset)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold every call for `seconds` (e.g. after a 429 with Retry-After).
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "queued": len(self._queue),
+                "rpm_limit": self.requests.capacity,
+                "tpm_limit": self.tokens.capacity,
+                "requests_available": self.requests.level,
+                "tokens_available": self.tokens.level,
+                "paused_seconds": max(0.0, self._paused_until - time.monotonic()),
+            }
+
+
+@lru_cache(maxsize=1)
+def get_groq_rate_limiter() -> Optional[GroqRateLimiter]:
+    """
+    Process-wide limiter for Groq calls (None when GROQ_RATE_LIMIT_ENABLED is off).
+    """
+    if not GROQ_RATE_LIMIT_ENABLED:
+        return None
+    return GroqRateLimiter(
+        rpm=GROQ_RPM_LIMIT,
+        tpm=GROQ_TPM_LIMIT,
+        max_queue=GROQ_RATE_MAX_QUEUE,
+        max_wait=GROQ_RATE_MAX_WAIT_SECONDS,
+    )
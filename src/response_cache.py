@@ -0,0 +1,150 @@
+# src/response_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .config import (
+    GROQ_CACHE_MAX_ENTRIES,
+    GROQ_CACHE_TTL_SECONDS,
+    GROQ_CACHE_PATH,
+)
+
+# Many LLM calls are exact repeats (same bill + same question), so we cache
+# completions by everything that determines the output.
+
+
+def response_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    """
+    Cache key for one completion: model, prompt hash, temperature, max_tokens.
+    """
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    raw = json.dumps([model, prompt_hash, float(temperature), int(max_tokens)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses.
+
+    - Memory tier: LRU with a max entry count and a TTL.
+    - Disk tier (optional): SQLite table, same TTL, survives restarts.
+      Expired rows are pruned on every write, and the table is capped at
+      `max_entries` rows (oldest first).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.db_path = Path(db_path) if db_path is not None else None
+
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if self.db_path is not None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at)")
+            self._prune(time.time())
+            self._db.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _put_memory(self, key: str, value: str, created_at: float) -> None:
+        self._entries[key] = (created_at + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _prune(self, now: float) -> None:
+        self._db.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def get(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns (value, tier) where tier is "memory" or "disk",
+        or (None, None) on a miss / expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value, "memory"
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if created_at + self.ttl > now:
+                        self._put_memory(key, value, created_at)
+                        self.disk_hits += 1
+                        return value, "disk"
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None, None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now),
+                )
+                self._prune(now)
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (hits / lookups) if lookups else 0.0,
+                "disk_enabled": self._db is not None,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache:
+    """
+    Process-wide LLM response cache, created once.
+    """
+    return ResponseCache(
+        max_entries=GROQ_CACHE_MAX_ENTRIES,
+        ttl_seconds=GROQ_CACHE_TTL_SECONDS,
+        db_path=GROQ_CACHE_PATH,
+    )
@@ -0,0 +1,128 @@
+# src/single_flight.py
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+from .config import SINGLE_FLIGHT_ENABLED
+
+# In-flight request coalescing: when identical requests (same input + same
+# parameters) overlap, only the first one runs the model / Groq call and the
+# others wait for its result. Unlike the response caches, nothing is kept
+# once the call finishes.
+
+
+def flight_key(*parts: Any) -> str:
+    """
+    Key for one call: a hash of its (JSON-serializable) inputs and parameters.
+    Long texts are hashed as part of the JSON, so keys stay short.
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and shares its result (or error)
+    with every caller that asked for the same key while it was running.
+
+    `do` is for blocking callers on worker threads; `do_async` for coroutines
+    on the event loop. The two paths keep separate in-flight tables.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, Future] = {}
+        self._tasks: Dict[tuple, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() unless an identical call is already running; then wait for it.
+        """
+        if not SINGLE_FLIGHT_ENABLED:
+            return fn()
+
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._calls[key]
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async version of do. The call runs as its own task, so a caller that
+        is cancelled (e.g. the client disconnected) does not cancel it for
+        the others.
+        """
+        if not SINGLE_FLIGHT_ENABLED:
+            return await fn()
+
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = loop.create_task(fn())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._tasks),
+        }
+
+
+_flights: Dict[str, SingleFlight] = {}
+_registry_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """
+    Process-wide coalescer for one kind of call (e.g. "summarize_text").
+    """
+    with _registry_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight(name)
+        return flight
+
+
+def single_flight_stats() -> Dict[str, dict]:
+    """
+    stats() of every coalescer, by name.
+    """
+    with _registry_lock:
+        flights = dict(_flights)
+    return {name: flight.stats() for name, flight in sorted(flights.items())}
@@ -1,22 +1,38 @@
 # src/summarizer.py
 
+from __future__ import annotations
+
+import threading
 from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator, List
 
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+# torch / transformers are imported on first use so importing this module
+# (e.g. at API startup) stays cheap
+if TYPE_CHECKING:
+    import torch
 
 from .config import (
     SUMMARIZATION_MODEL_NAME,
     MODELS_DIR,
     MAX_INPUT_LENGTH,
     MAX_TARGET_LENGTH,
+    SUMMARIZATION_BATCH_SIZE,
+    SUMMARIZATION_BATCH_WAIT_MS,
+    SUMMARIZATION_SEGMENT_MAX_NEW_TOKENS,
+    SUMMARIZATION_MAX_REDUCE_LEVELS,
+    INFERENCE_BACKEND,
 )
+from .batcher import MicroBatcher
+from .metrics import observe, timed
+from .single_flight import flight_key, get_single_flight
 
 # Folder where we saved fine-tuned model in train_summarization.py
 FINETUNED_DIR = MODELS_DIR / "summarizer-t5-small"
 
 
 def _get_device() -> torch.device:
+    import torch
+
     if torch.backends.mps.is_available():
         print("Using Apple MPS device")
         return torch.device("mps")
@@ -32,40 +48,62 @@ def load_model_and_tokenizer():
     """
     Load tokenizer + model once and cache them.
     Prefer fine-tuned model if it exists, else base model.
+    With INFERENCE_BACKEND="onnx", the model is an int8 ONNX Runtime model on CPU.
     """
-    if FINETUNED_DIR.exists():
-        print(f"Loading fine-tuned model from {FINETUNED_DIR}")
-        tokenizer = AutoTokenizer.from_pretrained(FINETUNED_DIR)
-        model = AutoModelForSeq2SeqLM.from_pretrained(FINETUNED_DIR)
-    else:
-        print(f"Fine-tuned model not found. Loading base model {SUMMARIZATION_MODEL_NAME}")
-        tokenizer = AutoTokenizer.from_pretrained(SUMMARIZATION_MODEL_NAME)
-        model = AutoModelForSeq2SeqLM.from_pretrained(SUMMARIZATION_MODEL_NAME)
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    source = FINETUNED_DIR if FINETUNED_DIR.exists() else SUMMARIZATION_MODEL_NAME
+
+    with timed("model_load_seconds", {"model": "summarizer"}):
+        if INFERENCE_BACKEND == "onnx":
+            import torch
+            from .onnx_backend import load_quantized_seq2seq
+
+            tokenizer, model = load_quantized_seq2seq(source)
+            return tokenizer, model, torch.device("cpu")
 
-    device = _get_device()
-    model.to(device)
-    model.eval()
+        if FINETUNED_DIR.exists():
+            print(f"Loading fine-tuned model from {FINETUNED_DIR}")
+            tokenizer = AutoTokenizer.from_pretrained(FINETUNED_DIR)
+            model = AutoModelForSeq2SeqLM.from_pretrained(FINETUNED_DIR)
+        else:
+            print(f"Fine-tuned model not found. Loading base model {SUMMARIZATION_MODEL_NAME}")
+            tokenizer = AutoTokenizer.from_pretrained(SUMMARIZATION_MODEL_NAME)
+            model = AutoModelForSeq2SeqLM.from_pretrained(SUMMARIZATION_MODEL_NAME)
+
+        device = _get_device()
+        model.to(device)
+        model.eval()
 
     return tokenizer, model, device
 
 
-def summarize_text(text: str, max_new_tokens: int = 256) -> str:
+def summarize_texts(texts: List[str], max_new_tokens: int = 256) -> List[str]:
     """
-    Generate a summary for the given legal/policy text.
+    Summarize several texts with one padded, batched generate call.
     """
+    import torch
+
+    if not texts:
+        return []
+
     tokenizer, model, device = load_model_and_tokenizer()
 
     # For T5 we use a "summarize:" prefix
-    prefixed_text = f"summarize: {text}"
+    prefixed_texts = [f"summarize: {text}" for text in texts]
 
-    inputs = tokenizer(
-        prefixed_text,
-        return_tensors="pt",
-        truncation=True,
-        max_length=MAX_INPUT_LENGTH,
-    ).to(device)
+    with timed("summarizer_tokenize_seconds"):
+        inputs = tokenizer(
+            prefixed_texts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=MAX_INPUT_LENGTH,
+        ).to(device)
+    observe("summarizer_batch_size", len(texts))
+    observe("summarizer_input_tokens", int(inputs["attention_mask"].sum()))
 
-    with torch.no_grad():
+    with timed("summarizer_generate_seconds"), torch.no_grad():
         generated_ids = model.generate(
             **inputs,
             max_new_tokens=max_new_tokens,
@@ -74,5 +112,183 @@ def summarize_text(text: str, max_new_tokens: int = 256) -> str:
             early_stopping=True,
         )
 
-    summary = tokenizer.decode(generated_ids[0], skip_special_tokens=True)
-    return summary
+    return tokenizer.batch_decode(generated_ids, skip_special_tokens=True)
+
+
+def _summarize_batch(requests: List[tuple]) -> List[str]:
+    """
+    Batch handler for the summarization batcher.
+    Requests are (text, max_new_tokens); each distinct max_new_tokens
+    gets its own generate call so no request is cut short or over-generated.
+    """
+    results: List[str] = [""] * len(requests)
+    by_length = {}
+    for i, (_, max_new_tokens) in enumerate(requests):
+        by_length.setdefault(max_new_tokens, []).append(i)
+
+    for max_new_tokens, indices in by_length.items():
+        summaries = summarize_texts(
+            [requests[i][0] for i in indices],
+            max_new_tokens=max_new_tokens,
+        )
+        for i, summary in zip(indices, summaries):
+            results[i] = summary
+    return results
+
+
+@lru_cache(maxsize=1)
+def get_summarization_batcher() -> MicroBatcher:
+    """
+    Process-wide batcher in front of the summarization model.
+    """
+    return MicroBatcher(
+        _summarize_batch,
+        max_batch_size=SUMMARIZATION_BATCH_SIZE,
+        max_wait_ms=SUMMARIZATION_BATCH_WAIT_MS,
+        name="summarization-batcher",
+    )
+
+
+def summarize_text(text: str, max_new_tokens: int = 256) -> str:
+    """
+    Generate a summary for the given legal/policy text.
+
+    Concurrent calls are micro-batched into a single generate call, and
+    concurrent calls with the same text and length share one result.
+    """
+    key = flight_key(text, max_new_tokens)
+    with timed("summarize_request_seconds"):
+        return get_single_flight("summarize_text").do(
+            key, lambda: get_summarization_batcher()((text, max_new_tokens))
+        )
+
+
+def stream_summary(text: str, max_new_tokens: int = 256) -> Iterator[str]:
+    """
+    Generate a summary and yield decoded text pieces as they are produced.
+
+    Streaming is not supported with beam search, so this path decodes
+    greedily and bypasses the batcher; use summarize_text for the
+    beam-search summary.
+    """
+    import torch
+    from transformers import TextIteratorStreamer
+
+    tokenizer, model, device = load_model_and_tokenizer()
+
+    inputs = tokenizer(
+        f"summarize: {text}",
+        return_tensors="pt",
+        truncation=True,
+        max_length=MAX_INPUT_LENGTH,
+    ).to(device)
+
+    streamer = TextIteratorStreamer(
+        tokenizer,
+        skip_prompt=True,
+        skip_special_tokens=True,
+    )
+
+    errors = []
+
+    def _generate():
+        try:
+            with torch.no_grad():
+                model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    num_beams=1,
+                    streamer=streamer,
+                )
+        except Exception as e:
+            errors.append(e)
+            streamer.end()  # unblock the consumer
+
+    thread = threading.Thread(target=_generate, daemon=True)
+    thread.start()
+    for piece in streamer:
+        if piece:
+            yield piece
+    thread.join()
+    if errors:
+        raise errors[0]
+
+# ---- Long documents: hierarchical map-reduce ----
+
+SUMMARY_PREFIX = "summarize: "
+
+
+def _segment_budget() -> int:
+    """
+    Tokens of document text that fit in one model input next to the prefix
+    and the end-of-sequence token.
+    """
+    tokenizer, _, _ = load_model_and_tokenizer()
+    prefix_tokens = len(tokenizer(SUMMARY_PREFIX, add_special_tokens=False)["input_ids"])
+    return MAX_INPUT_LENGTH - prefix_tokens - 1
+
+
+def _split_into_segments(text: str, budget: int) -> List[str]:
+    """
+    Split text into consecutive segments of at most `budget` tokens,
+    cutting the original string at token boundaries.
+    """
+    tokenizer, _, _ = load_model_and_tokenizer()
+    offsets = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+    )["offset_mapping"]
+
+    segments = []
+    for i in range(0, len(offsets), budget):
+        window = offsets[i : i + budget]
+        segment = text[window[0][0] : window[-1][1]].strip()
+        if segment:
+            segments.append(segment)
+    return segments
+
+
+def _count_tokens(text: str) -> int:
+    tokenizer, _, _ = load_model_and_tokenizer()
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def _map_segments(segments: List[str], max_new_tokens: int) -> List[str]:
+    """
+    Summarize independent segments in parallel.
+    All segments are queued on the summarization batcher at once, so they are
+    decoded together in batched generate calls.
+    """
+    batcher = get_summarization_batcher()
+    futures = [batcher.submit((segment, max_new_tokens)) for segment in segments]
+    return [future.result() for future in futures]
+
+
+def summarize_long_text(text: str, max_new_tokens: int = 256) -> str:
+    """
+    Summarize text of any length.
+
+    - map: split into token-budgeted segments and summarize each one
+    - reduce: join the partial summaries and repeat until they fit in a single
+      model input, then produce the final summary
+    """
+    budget = _segment_budget()
+    current = text
+    current_tokens = _count_tokens(current)
+
+    for _ in range(SUMMARIZATION_MAX_REDUCE_LEVELS):
+        if current_tokens <= budget:
+            break
+
+        segments = _split_into_segments(current, budget)
+        partial_summaries = _map_segments(segments, SUMMARIZATION_SEGMENT_MAX_NEW_TOKENS)
+        reduced = " ".join(s.strip() for s in partial_summaries if s.strip())
+        reduced_tokens = _count_tokens(reduced)
+
+        # Stop if a round no longer shrinks the text; the final call truncates
+        if reduced_tokens >= current_tokens:
+            break
+        current, current_tokens = reduced, reduced_tokens
+
+    return summarize_text(current, max_new_tokens=max_new_tokens)
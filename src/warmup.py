@@ -0,0 +1,148 @@
+# src/warmup.py
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Tuple
+
+from .config import RAG_CHUNKER, WARMUP_MODELS
+
+# Models are loaded lazily on first use. This module loads them ahead of time
+# (in a background thread at startup) and tracks per-model readiness.
+
+WARMUP_TEXT = (
+    "SECTION 1. SHORT TITLE. This Act may be cited as the Example Act. "
+    "SEC. 2. The Secretary of Labor shall report to Congress by January 1, 2025."
+)
+
+
+def _summarizer() -> Tuple[Callable, Callable]:
+    from .summarizer import load_model_and_tokenizer, summarize_texts
+
+    return load_model_and_tokenizer, lambda: summarize_texts([WARMUP_TEXT], max_new_tokens=8)
+
+
+def _qa() -> Tuple[Callable, Callable]:
+    from .qa import answer_question, load_qa_model_and_tokenizer
+
+    return load_qa_model_and_tokenizer, lambda: answer_question("Who shall report?", WARMUP_TEXT)
+
+
+def _embedder() -> Tuple[Callable, Callable]:
+    from .legal_chunker import load_chunk_tokenizer
+    from .rag import document_spans, load_embedder
+
+    def _load():
+        load_embedder()
+        if RAG_CHUNKER == "legal":  # counts chunk sizes in embedder word pieces
+            load_chunk_tokenizer()
+
+    def _dummy():
+        document_spans(WARMUP_TEXT)  # the configured chunker (legal, or punkt)
+        load_embedder().encode([WARMUP_TEXT], convert_to_numpy=True, normalize_embeddings=True)
+
+    return _load, _dummy
+
+
+def _prompt_tokenizer() -> Tuple[Callable, Callable]:
+    from .context_packer import count_tokens, load_prompt_tokenizer
+
+    return load_prompt_tokenizer, lambda: count_tokens([WARMUP_TEXT])
+
+
+def _ner() -> Tuple[Callable, Callable]:
+    from .ner import extract_entities, load_ner_model
+
+    return load_ner_model, lambda: extract_entities(WARMUP_TEXT)
+
+
+# name -> function returning (loader, dummy inference)
+MODELS: Dict[str, Callable[[], Tuple[Callable, Callable]]] = {
+    "summarizer": _summarizer,
+    "qa": _qa,
+    "embedder": _embedder,
+    "ner": _ner,
+    "prompt_tokenizer": _prompt_tokenizer,
+}
+
+# name -> (module, loader function); used to notice models loaded on demand
+_LOADERS = {
+    "summarizer": ("summarizer", "load_model_and_tokenizer"),
+    "qa": ("qa", "load_qa_model_and_tokenizer"),
+    "embedder": ("rag", "load_embedder"),
+    "ner": ("ner", "load_ner_model"),
+    "prompt_tokenizer": ("context_packer", "load_prompt_tokenizer"),
+}
+
+_lock = threading.Lock()
+_status: Dict[str, dict] = {
+    name: {"state": "not_loaded", "load_seconds": None, "warmup_seconds": None, "error": None}
+    for name in MODELS
+}
+
+
+def _set(name: str, **fields) -> None:
+    with _lock:
+        _status[name].update(fields)
+
+
+def warm_up_model(name: str) -> None:
+    """
+    Load one model and run a dummy inference, recording state and timings.
+    """
+    _set(name, state="loading", error=None)
+    try:
+        loader, dummy = MODELS[name]()
+        start = time.perf_counter()
+        loader()
+        _set(name, load_seconds=round(time.perf_counter() - start, 3))
+
+        start = time.perf_counter()
+        dummy()
+        _set(name, state="ready", warmup_seconds=round(time.perf_counter() - start, 3))
+    except Exception as e:
+        print(f"Warm-up failed for {name}: {e}")
+        _set(name, state="failed", error=str(e))
+
+
+def warm_up(models: Iterable[str] = WARMUP_MODELS) -> None:
+    for name in models:
+        warm_up_model(name)
+
+
+def start_background_warmup(models: Iterable[str] = WARMUP_MODELS) -> threading.Thread:
+    """
+    Warm up models one after another in a daemon thread.
+    """
+    models = list(models)
+    for name in models:
+        _set(name, state="pending")
+    thread = threading.Thread(target=warm_up, args=(models,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _loaded_on_demand(name: str) -> bool:
+    module_name, loader_name = _LOADERS[name]
+    module = sys.modules.get(f"{__package__}.{module_name}")
+    if module is None:  # never imported, so certainly not loaded
+        return False
+    return getattr(module, loader_name).cache_info().currsize > 0
+
+
+def readiness(models: Iterable[str] = WARMUP_MODELS) -> dict:
+    """
+    Per-model state; ready only when every listed model is ready.
+    """
+    models = list(models)
+    with _lock:
+        status = {name: dict(_status[name]) for name in models}
+    for name, s in status.items():
+        if s["state"] == "not_loaded" and _loaded_on_demand(name):
+            s["state"] = "ready"
+    return {
+        "ready": all(s["state"] == "ready" for s in status.values()),
+        "models": status,
+    }